@@ -0,0 +1,281 @@
+import asyncio
+import datetime as dt
+import json
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from bazi_calculator import BaziResult, calculate_bazi_with_solar_correction, compute_bazi_result
+from solar_terms import FIRST_SOLAR_YEAR, LAST_SOLAR_YEAR
+
+# Headless JSON API for chart computation.
+#
+# A plain ASGI application (no web framework), served by uvicorn:
+#
+#   python api_server.py [host] [port]
+#
+# Routes (all JSON):
+#   GET  /health
+#   POST /v1/chart                — compute_bazi_result: dob, time, country[, city]
+#   POST /v1/chart/batch          — {"items": [...]} of the above
+#   POST /v1/solar-chart          — calculate_bazi_with_solar_correction:
+#                                   dob, time, longitude, utc_offset
+#   POST /v1/solar-chart/batch    — {"items": [...]} of the above
+#
+# Computation runs in a bounded worker pool (threads by default, processes
+# with MYELEMENT_API_EXECUTOR=process) so the event loop only parses and
+# serializes. At most MAX_PENDING_JOBS jobs may be queued or running; beyond
+# that requests are refused with 503 rather than piling up. A batch is one
+# job. Connections are kept alive between requests (KEEP_ALIVE_S).
+#
+# Errors are {"error": {"code", "message"[, "field"]}} with a matching HTTP
+# status; in a batch each item carries its own result or error.
+
+API_WORKERS = int(os.environ.get("MYELEMENT_API_WORKERS", min(8, os.cpu_count() or 1)))
+API_EXECUTOR = os.environ.get("MYELEMENT_API_EXECUTOR", "thread")
+MAX_PENDING_JOBS = 256
+MAX_BATCH_ITEMS = 1000
+MAX_BODY_BYTES = 1 << 20
+KEEP_ALIVE_S = 30
+
+class ApiError(Exception):
+    """An error reported to the client as a structured JSON body."""
+    def __init__(self, status: int, code: str, message: str, field: str | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.field = field
+
+    def __reduce__(self):
+        # Keep the structured fields when raised in a worker process
+        return ApiError, (self.status, self.code, self.message, self.field)
+
+    def to_dict(self) -> dict[str, object]:
+        error = {"code": self.code, "message": self.message}
+        if self.field is not None:
+            error["field"] = self.field
+        return {"error": error}
+
+# ————————————————————————————————————————————————————
+# Request Parsing
+# ————————————————————————————————————————————————————
+def _field(item: dict, name: str, parse, required: bool = True):
+    """Return item[name] converted by parse, raising ApiError (422) if missing or invalid."""
+    value = item.get(name)
+    if value is None:
+        if required:
+            raise ApiError(422, "missing_field", f"'{name}' is required", name)
+        return None
+    try:
+        return parse(value)
+    except (TypeError, ValueError) as err:
+        raise ApiError(422, "invalid_field", f"Invalid '{name}': {err}", name) from None
+
+def _parse_date(value: str) -> dt.date:
+    date = dt.date.fromisoformat(value)
+    # Charts are only defined within the solar-term table (and outside it the
+    # solar-time shift can overflow datetime)
+    if not FIRST_SOLAR_YEAR <= date.year <= LAST_SOLAR_YEAR:
+        raise ValueError(f"year must be within {FIRST_SOLAR_YEAR}-{LAST_SOLAR_YEAR}")
+    return date
+
+def _parse_time(value: str) -> dt.time:
+    btime = dt.time.fromisoformat(value)
+    if btime.tzinfo is not None:
+        raise ValueError("expected a local time without a UTC offset")
+    return btime
+
+def _parse_text(value: str) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("expected a non-empty string")
+    return value
+
+def _parse_float(value: float) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("expected a number")
+    return float(value)
+
+def result_to_json(result: BaziResult) -> dict[str, object]:
+    """Return a BaziResult as JSON-ready values (datetimes in ISO format)."""
+    data = result.to_dict()
+    data["utc_offset"] = result.utc_offset
+    for key in ("standard_dt", "solar_dt"):
+        data[key] = data[key].isoformat()
+    return data
+
+# ————————————————————————————————————————————————————
+# Jobs (run in the worker pool)
+# ————————————————————————————————————————————————————
+def chart_job(item: dict) -> dict[str, object]:
+    """Compute one chart from place names.
+
+    Raises:
+        ApiError: If a field is invalid or the place cannot be resolved.
+    """
+    if not isinstance(item, dict):
+        raise ApiError(422, "invalid_item", "Expected a JSON object")
+    dob = _field(item, "dob", _parse_date)
+    btime = _field(item, "time", _parse_time)
+    country = _field(item, "country", _parse_text)
+    city = _field(item, "city", _parse_text, required=False)
+    result, tz_or_err = compute_bazi_result(dob, btime, country, city)
+    if result is None:
+        if tz_or_err.startswith("Error:"):
+            raise ApiError(500, "computation_failed", tz_or_err)
+        raise ApiError(404, "place_not_found", tz_or_err, "country")
+    return {"timezone": tz_or_err, "result": result_to_json(result)}
+
+def solar_chart_job(item: dict) -> dict[str, object]:
+    """Compute one chart from a longitude and UTC offset.
+
+    Raises:
+        ApiError: If a field is invalid.
+    """
+    if not isinstance(item, dict):
+        raise ApiError(422, "invalid_item", "Expected a JSON object")
+    dob = _field(item, "dob", _parse_date)
+    btime = _field(item, "time", _parse_time)
+    longitude = _field(item, "longitude", _parse_float)
+    utc_offset = _field(item, "utc_offset", _parse_float)
+    if not -180 <= longitude <= 180:
+        raise ApiError(422, "invalid_field", "'longitude' must be within [-180, 180]", "longitude")
+    if not -14 <= utc_offset <= 14:
+        raise ApiError(422, "invalid_field", "'utc_offset' must be within [-14, 14]", "utc_offset")
+    return {"result": result_to_json(calculate_bazi_with_solar_correction(dob, btime, longitude, utc_offset))}
+
+def batch_job(job, items: list) -> list[dict[str, object]]:
+    """Run a job per item, reporting each item's result or error."""
+    results = []
+    for item in items:
+        try:
+            results.append({"ok": True, **job(item)})
+        except ApiError as err:
+            results.append({"ok": False, "status": err.status, **err.to_dict()})
+        except Exception as err:
+            results.append({"ok": False, "status": 500, "error": {"code": "internal_error", "message": str(err)}})
+    return results
+
+ROUTES = {
+    "/v1/chart": chart_job,
+    "/v1/solar-chart": solar_chart_job,
+}
+
+# ————————————————————————————————————————————————————
+# ASGI Application
+# ————————————————————————————————————————————————————
+class ChartApi:
+    """ASGI app computing charts in a bounded worker pool."""
+
+    def __init__(self, workers: int = API_WORKERS, executor: str = API_EXECUTOR,
+                 max_pending: int = MAX_PENDING_JOBS) -> None:
+        """Create the app (the pool starts with the first request or at lifespan startup).
+
+        Args:
+            workers: Pool size.
+            executor: "thread" or "process".
+            max_pending: Jobs queued or running before requests get 503.
+        """
+        self.workers = workers
+        self.executor_kind = executor
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._pending = 0
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="chart-api")
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func, *args):
+        """Run func(*args) in the pool, or raise 503 if too many jobs are pending."""
+        if self._pending >= self.max_pending:
+            raise ApiError(503, "overloaded", "Too many requests in progress; retry shortly")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), func, *args)
+        finally:
+            self._pending -= 1
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        try:
+            status, body = await self._handle(scope, receive)
+        except ApiError as err:
+            status, body = err.status, err.to_dict()
+        except Exception as err:
+            status, body = 500, {"error": {"code": "internal_error", "message": str(err)}}
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                        (b"content-length", str(len(payload)).encode("ascii"))],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._pool()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _handle(self, scope, receive) -> tuple[int, object]:
+        path, method = scope["path"].rstrip("/") or "/", scope["method"]
+        if path == "/health":
+            return 200, {"status": "ok", "pending_jobs": self._pending, "workers": self.workers}
+        batch = path.endswith("/batch")
+        job = ROUTES.get(path[:-len("/batch")] if batch else path)
+        if job is None:
+            raise ApiError(404, "not_found", f"No route {path}")
+        if method != "POST":
+            raise ApiError(405, "method_not_allowed", "Use POST")
+        payload = await self._read_json(receive)
+        if not batch:
+            return 200, await self._run(job, payload)
+        items = payload.get("items") if isinstance(payload, dict) else None
+        if not isinstance(items, list):
+            raise ApiError(422, "missing_field", "'items' must be a list", "items")
+        if len(items) > MAX_BATCH_ITEMS:
+            raise ApiError(413, "batch_too_large", f"At most {MAX_BATCH_ITEMS} items per batch", "items")
+        return 200, {"results": await self._run(batch_job, job, items)}
+
+    @staticmethod
+    async def _read_json(receive) -> object:
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if len(body) > MAX_BODY_BYTES:
+                raise ApiError(413, "body_too_large", f"Request body exceeds {MAX_BODY_BYTES} bytes")
+            if not message.get("more_body"):
+                break
+        try:
+            return json.loads(body)
+        except ValueError as err:
+            raise ApiError(400, "invalid_json", f"Request body is not valid JSON: {err}") from None
+
+app = ChartApi()
+
+if __name__ == "__main__":
+    import uvicorn
+    host = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    uvicorn.run(app, host=host, port=port, timeout_keep_alive=KEEP_ALIVE_S, log_level="warning")
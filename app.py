@@ -8,13 +8,13 @@ st.set_page_config(
 )
 
 import datetime as dt
-from bazi_calculator import compute_bazi_result, get_day_stem
 from display_helpers import (
     display_custom_css, display_hero_image, display_main_input_form, display_identity_card, display_pillars_table, display_element_star_meter, display_element_score_breakdown, display_time_info,
     display_all_feature_cards, display_hero_section, display_footer, display_identity_expanded_paragraphs, display_privacy_note, display_paywall_card, display_pdf_request_form, display_user_summary,
     section_divider, my_scroll_callback, display_accuracy_survey
 )
-from gsheet_helpers import append_survey_response
+from storage import save_survey_response
+from geo_services import start_warm_up
 from bazi_constants import DAY_MASTER_IDENTITIES
 from product_constants import PRODUCT_NAME, STRIPE_CHECKOUT, PRODUCT_PDF_COVER, PRODUCT_PDF_CONTENT, LEFT_BULLETS, RIGHT_BULLETS
 
@@ -31,6 +31,9 @@ def _init_state():
     for k, v in defaults.items():
         st.session_state.setdefault(k, v)
 
+# Load the shared geocoder/timezone finder before the first lookup needs them.
+start_warm_up()
+
 # Inject CSS for the submit button to match hero call-to-action styling.
 display_custom_css()
 
@@ -49,7 +52,7 @@ section_divider()
 display_all_feature_cards(my_scroll_callback)
 
 # Main input form (with card background)
-name, gender, country, dob, hour, minute, generate_clicked = display_main_input_form()# with st.form("star_meter_form"):
+name, gender, country, city, dob, hour, minute, generate_clicked = display_main_input_form()# with st.form("star_meter_form"):
    
 # Handle generate logic and confirmation
 if generate_clicked:
@@ -64,8 +67,9 @@ if st.session_state["awaiting_confirm"]:
     with col2:
         if st.button("✔ Yes, my birth time is accurate — generate my result"):
             birth_time = dt.time(hour, minute)
+            from bazi_calculator import compute_bazi_result   # first use loads the chart engine
             with st.spinner("Calculating your Elemental Star Meter..."):
-                bazi, tz_or_err = compute_bazi_result(dob, birth_time, country)
+                bazi, tz_or_err = compute_bazi_result(dob, birth_time, country, city)
             if bazi is None:
                 st.error(tz_or_err)
             else:
@@ -95,6 +99,7 @@ if "bazi_result" in st.session_state and st.session_state["bazi_result"]:
     display_user_summary(name, gender, country, dob, birth_time)
 
     # Identity header
+    from bazi_calculator import get_day_stem
     dm_stem = get_day_stem(st.session_state["bazi_result"])
     dm_info = DAY_MASTER_IDENTITIES[dm_stem]
     
@@ -130,7 +135,7 @@ if "bazi_result" in st.session_state and st.session_state["bazi_result"]:
         if rating is not None:
             user_id = st.session_state.get("submitted_email", "anon")
             user_name = st.session_state.get("name", "")
-            append_survey_response(rating, user_id, user_name)
+            save_survey_response(rating, user_id, user_name)
             st.session_state["survey_completed"] = True
 
     section_divider()
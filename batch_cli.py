@@ -0,0 +1,352 @@
+import argparse
+import csv
+import datetime as dt
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
+import numpy as np
+from bazi_constants import ELEMENTS, JIA_ZI
+from solar_terms import FIRST_SOLAR_YEAR, LAST_SOLAR_YEAR
+
+# Command-line scoring of birth-record files.
+#
+#   python batch_cli.py births.csv charts.parquet --workers 4
+#   python batch_cli.py births.jsonl charts.jsonl --resume-from 2000000
+#
+# Each record needs "dob" (YYYY-MM-DD) and "time" (HH:MM), plus either
+# "longitude" and "utc_offset" or "country" (pycountry name) and optionally
+# "city", which are resolved exactly as the app resolves them
+# (bazi_calculator.resolve_location: bundled gazetteer and country index,
+# then the shared geocode cache), so a record gets the same chart from
+# either. Input columns are
+# passed through; the chart is appended under OUTPUT_COLUMNS, all prefixed
+# with "bazi_" so they never overwrite an input column (an input that
+# already has one, e.g. a previous run's output, is refused). Records that
+# cannot be scored get a "bazi_error".
+#
+# Records are read lazily in chunks of --chunk-rows and each chunk is scored
+# by the vectorized engine (bazi_batch, row-for-row identical to
+# calculate_bazi_with_solar_correction) in a process pool. At most two
+# chunks per worker are in flight and results are written in input order,
+# so memory stays bounded on files of any size. Output is flushed chunk by
+# chunk; after an interruption, rerun with --resume-from set to the number
+# of records already written. CSV/JSONL output is then appended to. A
+# Parquet file cannot be appended to, so a resumed run writes a part file
+# next to it (charts.parquet -> charts.from-2000000.parquet); read both
+# together, e.g. as one pyarrow dataset.
+
+FORMATS = ("csv", "jsonl", "parquet")
+DEFAULT_CHUNK_ROWS = 10_000
+OUTPUT_PREFIX = "bazi_"
+ELEMENT_FIELDS = [f"{e.lower()}_score" for e in ELEMENTS]
+OUTPUT_FIELDS = [
+    "record", "timezone", "utc_offset", "standard_dt", "solar_dt", "longitude_correction_min", "EoT_min",
+    "year_pillar", "month_pillar", "day_pillar", "hour_pillar", "strength", "strength_score",
+    *ELEMENT_FIELDS, "error",
+]
+OUTPUT_COLUMNS = [OUTPUT_PREFIX + field for field in OUTPUT_FIELDS]
+ERROR_COLUMN = OUTPUT_PREFIX + "error"
+_OUTPUT_COLUMN_SET = frozenset(OUTPUT_COLUMNS)
+
+# ————————————————————————————————————————————————————
+# Scoring (runs in worker processes)
+# ————————————————————————————————————————————————————
+PLACE_CACHE_SIZE = 4096
+_places: dict[tuple[str, str], tuple[float, str] | None] = {}
+
+def _resolve_place(country: str, city: str) -> tuple[float, str] | None:
+    """Return (longitude, timezone) of a birthplace, or None.
+
+    Places are resolved by bazi_calculator.resolve_location, like the app's
+    charts. Only authoritative answers are memoized: a stand-in used while
+    the geocoder is down is looked up again on the next record.
+    """
+    key = (country, city)
+    if key in _places:
+        return _places[key]
+    from bazi_calculator import resolve_location
+    location, authoritative = resolve_location(country, city)
+    place = (location.longitude, location.timezone) if location else None
+    if authoritative:
+        if len(_places) >= PLACE_CACHE_SIZE:
+            _places.clear()
+        _places[key] = place
+    return place
+
+def _present(value) -> bool:
+    return value is not None and str(value).strip() != ""
+
+def _parse_record(record: dict) -> tuple[dt.date, dt.time, float, float, str]:
+    """Return (dob, time, longitude, utc_offset, timezone) of a record.
+
+    Raises:
+        KeyError, ValueError, TypeError: If the record cannot be scored.
+    """
+    from tz_offsets import utc_offset_hours
+    dob = dt.date.fromisoformat(str(record["dob"]).strip())
+    if not FIRST_SOLAR_YEAR <= dob.year <= LAST_SOLAR_YEAR:
+        raise ValueError(f"dob year must be within {FIRST_SOLAR_YEAR}-{LAST_SOLAR_YEAR}")
+    btime = dt.time.fromisoformat(str(record["time"]).strip())
+    if _present(record.get("longitude")) and _present(record.get("utc_offset")):
+        longitude, utc_offset = float(record["longitude"]), float(record["utc_offset"])
+        # Comparisons are False for NaN, so non-finite values are rejected too
+        if not -180 <= longitude <= 180:
+            raise ValueError("longitude must be within [-180, 180]")
+        if not -14 <= utc_offset <= 14:
+            raise ValueError("utc_offset must be within [-14, 14]")
+        return dob, btime, longitude, utc_offset, ""
+    country = str(record.get("country") or "").strip()
+    city = str(record.get("city") or "").strip()
+    if not country:
+        raise ValueError("needs longitude and utc_offset, or country")
+    place = _resolve_place(country, city)
+    if place is None:
+        raise ValueError(f"place not found: {country}")
+    longitude, tz = place
+    return dob, btime, longitude, utc_offset_hours(tz, dt.datetime.combine(dob, btime)), tz
+
+def score_chunk(first_record: int, records: list[dict], mode: str | None = None) -> list[dict]:
+    """Score one chunk of records.
+
+    Args:
+        first_record: Record number (0-based, in the whole input) of records[0].
+        records: Input records.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the default.
+
+    Returns:
+        Output rows (input columns followed by OUTPUT_COLUMNS), in input order.
+    """
+    outputs = [{**dict.fromkeys(OUTPUT_FIELDS), "record": first_record + i} for i in range(len(records))]
+    parsed, valid = [], []
+    for i, record in enumerate(records):
+        try:
+            parsed.append(_parse_record(record))
+            valid.append(i)
+        except (KeyError, ValueError, TypeError) as err:
+            outputs[i]["error"] = f"{type(err).__name__}: {err}"
+    if valid:
+        _score_valid(parsed, [outputs[i] for i in valid], mode)
+    return [{**record, **{OUTPUT_PREFIX + field: value for field, value in output.items()}}
+            for record, output in zip(records, outputs)]
+
+def _score_valid(parsed: list[tuple], outputs: list[dict], mode: str | None) -> None:
+    """Fill the output fields of successfully parsed records in place."""
+    from bazi_batch import calculate_bazi_batch
+    dobs, times, longitudes, offsets, zones = zip(*parsed)
+    batch = calculate_bazi_batch(np.array(dobs, dtype="datetime64[D]"), list(times),
+                                 np.array(longitudes), np.array(offsets), mode)
+    standard = np.datetime_as_string(batch["standard_dt"], unit="us")
+    solar = np.datetime_as_string(batch["solar_dt"], unit="us")
+    for j, row in enumerate(outputs):
+        row.update(
+            timezone=zones[j] or None,
+            utc_offset=offsets[j],
+            standard_dt=str(standard[j]),
+            solar_dt=str(solar[j]),
+            longitude_correction_min=float(batch["longitude_correction_min"][j]),
+            EoT_min=float(batch["EoT_min"][j]),
+            year_pillar=JIA_ZI[batch["year"][j]],
+            month_pillar=JIA_ZI[batch["month"][j]],
+            day_pillar=JIA_ZI[batch["day"][j]],
+            hour_pillar=JIA_ZI[batch["hour"][j]],
+            strength="Strong" if batch["strong"][j] else "Weak",
+            strength_score=int(batch["strength_score"][j]),
+        )
+        row.update(zip(ELEMENT_FIELDS, batch["element_strengths"][j].tolist()))
+
+# ————————————————————————————————————————————————————
+# Input / Output
+# ————————————————————————————————————————————————————
+def _format_of(path: str, explicit: str | None) -> str:
+    if explicit:
+        return explicit
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    fmt = {"ndjson": "jsonl", "pq": "parquet"}.get(ext, ext)
+    if fmt not in FORMATS:
+        raise SystemExit(f"Cannot tell the format of {path!r}; pass --input-format/--output-format")
+    return fmt
+
+def read_records(path: str, fmt: str) -> Iterator[dict]:
+    """Yield input records one at a time ("-" reads stdin)."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        elif fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise SystemExit("Parquet input is not supported; use CSV or JSONL")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def _parquet_schema(columns: list[str]):
+    """Chart columns with fixed types; input columns as text, whatever later chunks hold."""
+    import pyarrow as pa
+    text, real, integer = pa.string(), pa.float64(), pa.int64()
+    fixed = {
+        OUTPUT_PREFIX + field: kind for field, kind in {
+            "record": integer, "utc_offset": real, "longitude_correction_min": real, "EoT_min": real,
+            "strength_score": integer, **dict.fromkeys(ELEMENT_FIELDS, real),
+        }.items()
+    }
+    return pa.schema([(name, fixed.get(name, text)) for name in columns])
+
+def _as_text(value) -> str | None:
+    """An input value for a text column: strings as given, other JSON values serialized."""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+class _Writer:
+    """Appends chunks of output rows to a CSV, JSONL or Parquet file."""
+
+    def __init__(self, path: str, fmt: str, append: bool) -> None:
+        self.fmt = fmt
+        self.path = path
+        self._columns: list[str] | None = None
+        self._parquet = None
+        if fmt == "parquet":
+            if path == "-":
+                raise SystemExit("Parquet output needs a file path")
+            self._f = None
+        elif path == "-":
+            self._f = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="", write_through=True)
+        else:
+            self._f = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        self._write_header = fmt == "csv" and not (append and self._f is not None and self._f.tell() > 0)
+
+    def write(self, rows: list[dict]) -> None:
+        if self._columns is None:
+            self._columns = list(rows[0])
+        if self.fmt == "csv":
+            writer = csv.DictWriter(self._f, self._columns, extrasaction="ignore")
+            if self._write_header:
+                writer.writeheader()
+                self._write_header = False
+            writer.writerows(rows)
+        elif self.fmt == "jsonl":
+            self._f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, _parquet_schema(self._columns))
+            rows = [{name: row.get(name) if name in _OUTPUT_COLUMN_SET else _as_text(row.get(name))
+                     for name in self._columns} for row in rows]
+            table = pa.Table.from_pylist(rows, schema=self._parquet.schema)
+            self._parquet.write_table(table)
+        if self._f is not None:
+            self._f.flush()
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._f is not None and self.path != "-":
+            self._f.close()
+
+def _no_output_columns(records: Iterable[dict]) -> Iterator[dict]:
+    """Pass records through, refusing any that has a column the output would overwrite."""
+    for record in records:
+        if not _OUTPUT_COLUMN_SET.isdisjoint(record):
+            clash = ", ".join(sorted(_OUTPUT_COLUMN_SET.intersection(record)))
+            raise SystemExit(f"Input already has output column(s) {clash}; rename or drop them")
+        yield record
+
+def _chunks(records: Iterable[dict], size: int, first: int) -> Iterator[tuple[int, list[dict]]]:
+    records = iter(records)
+    while chunk := list(islice(records, size)):
+        yield first, chunk
+        first += len(chunk)
+
+# ————————————————————————————————————————————————————
+# Driver
+# ————————————————————————————————————————————————————
+def run(input_path: str, output_path: str, input_format: str | None = None, output_format: str | None = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS, workers: int | None = None, resume_from: int = 0,
+        mode: str | None = None) -> tuple[int, int]:
+    """Score an input file into an output file.
+
+    Args:
+        input_path: CSV or JSONL file, or "-" for stdin.
+        output_path: CSV, JSONL or Parquet file, or "-" for stdout (CSV/JSONL).
+        input_format: "csv" or "jsonl"; inferred from the extension if None.
+        output_format: "csv", "jsonl" or "parquet"; inferred if None.
+        chunk_rows: Records per chunk.
+        workers: Worker processes (default: CPU count); 0 scores in-process.
+        resume_from: Skip this many input records and append to the output
+            (Parquet: write them to a part file next to it).
+        mode: Ephemeris engine ("fast"/"precise"), or None for the default.
+
+    Returns:
+        Tuple of (records written, records with errors), not counting skipped ones.
+    """
+    output_format = _format_of(output_path, output_format)
+    if output_format == "parquet" and resume_from:
+        root, ext = os.path.splitext(output_path)
+        output_path = f"{root}.from-{resume_from}{ext}"
+        print(f"Writing records from {resume_from:,} on to {output_path}", file=sys.stderr)
+    records = _no_output_columns(islice(read_records(input_path, _format_of(input_path, input_format)), resume_from, None))
+    writer = _Writer(output_path, output_format, append=resume_from > 0)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    written = errors = 0
+
+    def emit(rows: list[dict]) -> None:
+        nonlocal written, errors
+        writer.write(rows)
+        written += len(rows)
+        errors += sum(row[ERROR_COLUMN] is not None for row in rows)
+        print(f"\r{resume_from + written:,} records", end="", file=sys.stderr, flush=True)
+
+    try:
+        if workers == 0:
+            for first, chunk in _chunks(records, chunk_rows, resume_from):
+                emit(score_chunk(first, chunk, mode))
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                in_flight = deque()
+                for first, chunk in _chunks(records, chunk_rows, resume_from):
+                    in_flight.append(pool.submit(score_chunk, first, chunk, mode))
+                    if len(in_flight) >= 2 * workers:
+                        emit(in_flight.popleft().result())
+                while in_flight:
+                    emit(in_flight.popleft().result())
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; resume with --resume-from {resume_from + written}", file=sys.stderr)
+        raise SystemExit(130)
+    finally:
+        writer.close()
+    print(file=sys.stderr)
+    return written, errors
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Score CSV/JSONL birth records into CSV, JSONL or Parquet.")
+    parser.add_argument("input", help="input file (.csv/.jsonl), or - for stdin")
+    parser.add_argument("output", help="output file (.csv/.jsonl/.parquet), or - for stdout")
+    parser.add_argument("--input-format", choices=FORMATS[:2])
+    parser.add_argument("--output-format", choices=FORMATS)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="records per work unit")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (0: no pool)")
+    parser.add_argument("--resume-from", type=int, default=0, metavar="N",
+                        help="skip the first N records and append to the output "
+                             "(Parquet: written to OUTPUT's .from-N part file)")
+    parser.add_argument("--mode", choices=("fast", "precise"), default=None, help="ephemeris engine")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    written, errors = run(args.input, args.output, args.input_format, args.output_format,
+                          args.chunk_rows, args.workers, args.resume_from, args.mode)
+    elapsed = time.perf_counter() - t0
+    print(f"Scored {written:,} records ({errors:,} errors) in {elapsed:.1f} s "
+          f"({written / elapsed if elapsed else 0:,.0f} records/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
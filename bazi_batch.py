@@ -0,0 +1,468 @@
+import datetime as dt
+from functools import lru_cache
+import numpy as np
+from bazi_calculator import equation_of_time as scalar_equation_of_time, support_value
+from chart_table import lookup_charts
+from ephemeris import FAST, resolve_mode, solar_longitude
+from solar_terms import FIRST_SOLAR_YEAR, TERMS_PER_YEAR, solar_term_table
+from bazi_constants import (
+    STEM, BRANCH, ORD_EPOCH, ELEMENTS, STEM_ELEM, BRANCH_ELEM, BRANCH_HIDDEN, SEASON_BONUS
+)
+
+# Vectorized counterparts of the scalar pipeline in bazi_calculator.
+# The time functions mirror their scalar namesakes operation-for-operation and
+# scoring reads per-pillar lookup tables, so batch results match
+# calculate_bazi_with_solar_correction row by row.
+#
+# calculate_bazi_batch does not simply chain the public functions: it splits
+# each date into calendar fields once and shifts them to the UTC instant
+# (recomputing only rows that leave their month), reads the equation of time
+# from a per-day-of-year table, and scores charts from chart_table.
+
+_US_PER_MINUTE = 60_000_000
+_US_PER_HOUR = 3_600_000_000
+_US_PER_DAY = 86_400_000_000
+_ORD_UNIX_EPOCH = dt.date(1970, 1, 1).toordinal()
+
+# ————————————————————————————————————————————————————
+# Lookup Tables (element indices follow ELEMENTS)
+# ————————————————————————————————————————————————————
+STEM_ELEM_IDX = np.array([ELEMENTS.index(e) for e in STEM_ELEM], dtype=np.int8)
+BRANCH_ELEM_IDX = np.array([ELEMENTS.index(e) for e in BRANCH_ELEM], dtype=np.int8)
+SUPPORT_MATRIX = np.array(
+    [[support_value(dm, other) for other in ELEMENTS] for dm in ELEMENTS], dtype=np.int8
+)
+SEASON_MATRIX = np.array(
+    [[SEASON_BONUS[b][e] for e in ELEMENTS] for b in BRANCH], dtype=np.int8
+)
+ELEMENT_ONE_HOT = np.eye(len(ELEMENTS), dtype=np.float64)
+# EOT_BY_YDAY[N - 1]: equation of time in minutes on day of year N, from the scalar formula
+EOT_BY_YDAY = np.array([scalar_equation_of_time(dt.date(2000, 1, 1) + dt.timedelta(days=n)) for n in range(366)])
+HIDDEN_MATRIX = np.zeros((len(BRANCH), len(ELEMENTS)), dtype=np.float64)
+for _b, _branch in enumerate(BRANCH):
+    for _s in BRANCH_HIDDEN[_branch]:
+        HIDDEN_MATRIX[_b, STEM_ELEM_IDX[STEM.index(_s)]] += 0.5
+
+# Per-pillar contributions indexed by sexagenary index (0-59), so that chart
+# scoring is a handful of gathers instead of per-stem/branch loops.
+_SEXAGENARY = np.arange(60)
+# PILLAR_SUPPORT[dm, p]: support the stem and branch of pillar p give day master element dm
+PILLAR_SUPPORT = (
+    SUPPORT_MATRIX[:, STEM_ELEM_IDX[_SEXAGENARY % 10]]
+    + SUPPORT_MATRIX[:, BRANCH_ELEM_IDX[_SEXAGENARY % 12]]
+).astype(np.int8)
+# PILLAR_ELEMENTS[p]: visible stem point plus hidden stem half-points of pillar p
+PILLAR_ELEMENTS = ELEMENT_ONE_HOT[STEM_ELEM_IDX[_SEXAGENARY % 10]] + HIDDEN_MATRIX[_SEXAGENARY % 12]
+# Month pillars also carry the season bonus, day pillars the day master self-point
+MONTH_PILLAR_ELEMENTS = PILLAR_ELEMENTS + SEASON_MATRIX[_SEXAGENARY % 12]
+DAY_PILLAR_ELEMENTS = PILLAR_ELEMENTS + ELEMENT_ONE_HOT[STEM_ELEM_IDX[_SEXAGENARY % 10]]
+
+# ————————————————————————————————————————————————————
+# Array Conversion Helpers
+# ————————————————————————————————————————————————————
+def _as_dates(dobs) -> np.ndarray:
+    """Convert an array-like of dates to datetime64[D]."""
+    return np.asarray(dobs, dtype="datetime64[D]")
+
+def _as_times(birth_times) -> np.ndarray:
+    """Convert an array-like of times since midnight to timedelta64[us].
+
+    Accepts timedelta64 arrays of any unit or `datetime.time` objects.
+    """
+    arr = np.asarray(birth_times)
+    if arr.dtype == object:
+        arr = np.array(
+            [dt.timedelta(hours=t.hour, minutes=t.minute, seconds=t.second, microseconds=t.microsecond) for t in arr.ravel()],
+            dtype="timedelta64[us]",
+        ).reshape(arr.shape)
+    return arr.astype("timedelta64[us]")
+
+def _civil_from_days(days: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Convert integer days since 1970-01-01 to proleptic Gregorian fields.
+
+    Integer-only arithmetic (H. Hinnant's civil_from_days), which is far cheaper
+    than casting datetime64 arrays to month/year units. It runs in int32,
+    whose divisions are about twice as fast as int64's (fine for any year
+    within a million of today's).
+
+    Returns:
+        Tuple of (year, month, day, day of year starting at 1).
+    """
+    z = days.astype(np.int32) + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    march_based = mp < 10
+    month = np.where(march_based, mp + 3, mp - 9)
+    year = yoe + era * 400 + ~march_based
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    yday = np.where(march_based, doy + 60 + leap, doy - 305)
+    return year, month, day, yday
+
+def _calendar_fields(stamps: np.ndarray) -> tuple[np.ndarray, ...]:
+    """Split datetime64[us] values into calendar fields.
+
+    Returns:
+        Tuple of (year, month, day, hour, minute, second, days since 1970-01-01).
+    """
+    us = stamps.astype(np.int64)
+    days = us // _US_PER_DAY
+    us_of_day = us - days * _US_PER_DAY
+    year, month, day, _ = _civil_from_days(days)
+    return (year, month, day, *_clock_fields(us_of_day), days)
+
+def _clock_fields(us_of_day: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split microseconds since midnight into (hour, minute, second)."""
+    return us_of_day // _US_PER_HOUR, us_of_day // _US_PER_MINUTE % 60, us_of_day // 1_000_000 % 60
+
+def _shift_civil(fields: tuple[np.ndarray, ...], days: np.ndarray, new_days: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Move (year, month, day) fields of `days` to `new_days`, a few days away.
+
+    Rows that stay within days 1-28 of their month only need the day moved;
+    the others are converted afresh.
+
+    Returns:
+        Tuple of (year, month, day) of new_days.
+    """
+    year, month, day = fields[:3]
+    new_day = day + (new_days - days)
+    moved = (new_day < 1) | (new_day > 28)
+    if moved.any():
+        year, month = year.copy(), month.copy()
+        year[moved], month[moved], new_day[moved], _ = _civil_from_days(new_days[moved])
+    return year, month, new_day
+
+def _term_positions(table: np.ndarray, jd: np.ndarray) -> np.ndarray:
+    """Index of the last solar term at or before each jd (-1 before the table).
+
+    Equivalent to searchsorted(table, jd, "right") - 1. Terms are close to
+    evenly spaced, so the position is estimated from the mean spacing and
+    corrected by one either way; rows the estimate misses are searched.
+    """
+    last = len(table) - 1
+    step = (table[-1] - table[0]) / last
+    guess = np.clip(np.floor((jd - table[0]) / step), 0, last - 1).astype(np.int64)
+    pos = guess - (jd < table[guess]) + (jd >= table[guess + 1])
+    inner = np.clip(pos, 0, last - 1)
+    missed = ((pos >= 0) & (jd < table[inner])) | ((pos < last) & (jd >= table[inner + 1]))
+    if missed.any():
+        pos[missed] = np.searchsorted(table, jd[missed], side="right") - 1
+    return pos
+
+@lru_cache(maxsize=None)
+def _solar_term_array(mode: str) -> np.ndarray:
+    """Return the solar term table of an ephemeris mode as a float64 array (built once)."""
+    return np.asarray(solar_term_table(mode), dtype=np.float64)
+
+def _minutes_to_us(minutes: np.ndarray) -> np.ndarray:
+    """Convert float minutes to integer microseconds the way `dt.timedelta` rounds them."""
+    whole = np.trunc(minutes)
+    return whole.astype(np.int64) * _US_PER_MINUTE + np.rint((minutes - whole) * _US_PER_MINUTE).astype(np.int64)
+
+# ————————————————————————————————————————————————————
+# Solar Time Correction
+# ————————————————————————————————————————————————————
+def equation_of_time(dobs) -> np.ndarray:
+    """Calculate the equation of time for an array of dates.
+
+    Args:
+        dobs: Array-like of dates (datetime64[D] compatible).
+
+    Returns:
+        Array of equation of time values in minutes.
+    """
+    _, _, _, N = _civil_from_days(_as_dates(dobs).astype(np.int64))
+    return EOT_BY_YDAY[N - 1]
+
+def solar_corrected_time(dobs, birth_times, local_longitudes, utc_offsets) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Calculate solar time corrected datetimes for arrays of births.
+
+    Args:
+        dobs: Array-like of dates of birth.
+        birth_times: Array-like of birth times (timedelta64 since midnight or `dt.time`).
+        local_longitudes: Array-like of local longitudes in degrees.
+        utc_offsets: Array-like of UTC offsets in hours.
+
+    Returns:
+        Tuple of (corrected datetime64[us], naive local datetime64[us], longitude correction in minutes, equation of time in minutes).
+    """
+    days = _as_dates(dobs)
+    _, _, _, N = _civil_from_days(days.astype(np.int64))
+    return _solar_correction(days, N, birth_times, local_longitudes, utc_offsets)
+
+def _solar_correction(days: np.ndarray, yday: np.ndarray, birth_times, local_longitudes, utc_offsets) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """solar_corrected_time for datetime64[D] dates whose day of year is known."""
+    naive_local = days.astype("datetime64[us]") + _as_times(birth_times)
+    reference_longitude = np.asarray(utc_offsets, dtype=np.float64) * 15
+    long_corr_min = (reference_longitude - np.asarray(local_longitudes, dtype=np.float64)) * 4
+    EoT_min = EOT_BY_YDAY[yday - 1]
+    corrected = (
+        naive_local
+        - _minutes_to_us(long_corr_min).astype("timedelta64[us]")
+        + _minutes_to_us(EoT_min).astype("timedelta64[us]")
+    )
+    return corrected, naive_local, long_corr_min, EoT_min
+
+# ————————————————————————————————————————————————————
+# BaZi Calculation Core
+# ————————————————————————————————————————————————————
+def sun_lon(jd: np.ndarray) -> np.ndarray:
+    """Calculate the sun's longitude for an array of Julian days.
+
+    Args:
+        jd: Array of Julian days.
+
+    Returns:
+        Array of sun longitudes in degrees.
+    """
+    T = (np.asarray(jd, dtype=np.float64) - 2451545.0) / 36525.0
+    L0 = (280.46646 + 36000.76983*T + 0.0003032*T*T) % 360
+    M  = (357.52911 + 35999.05029*T - 0.0001537*T*T) % 360
+    M  = np.radians(M)
+    C  = (1.914602 - 0.004817*T - 0.000014*T*T)*np.sin(M)
+    C += (0.019993 - 0.000101*T)*np.sin(2*M)
+    C += 0.000289*np.sin(3*M)
+    return (L0 + C) % 360
+
+def julian_day(utc) -> np.ndarray:
+    """Calculate Julian days from an array of UTC datetimes.
+
+    Args:
+        utc: Array-like of naive UTC datetimes (datetime64 compatible).
+
+    Returns:
+        Array of Julian days.
+    """
+    y, m, day, hour, minute, second, _ = _calendar_fields(np.asarray(utc, dtype="datetime64[us]"))
+    return _julian_day_from_fields(y, m, day, hour, minute, second)
+
+def _julian_day_from_fields(y, m, day, hour, minute, second) -> np.ndarray:
+    """julian_day from UTC calendar fields."""
+    d = day + (hour + minute/60 + second/3600)/24
+    early = m <= 2
+    y = np.where(early, y - 1, y)
+    m = np.where(early, m + 12, m)
+    A = y // 100
+    B = 2 - A + A // 4
+    whole = np.trunc(365.25*(y+4716)).astype(np.int64) + np.trunc(30.6001*(m+1)).astype(np.int64)
+    return whole + d + B - 1524.5
+
+def month_branch_idx(lon: np.ndarray) -> np.ndarray:
+    """Calculate month branch indices based on sun longitudes.
+
+    Args:
+        lon: Array of sun longitudes in degrees.
+
+    Returns:
+        Array of month branch indices (0-11, 0 = 寅 month).
+    """
+    adj = (np.asarray(lon) - 315) % 360
+    return (adj // 30).astype(np.int64)
+
+def hour_branch_idx(hour: np.ndarray) -> np.ndarray:
+    """Calculate hour branch indices based on hours.
+
+    Args:
+        hour: Array of hours of day (0-23).
+
+    Returns:
+        Array of hour branch indices (0-11).
+    """
+    return ((np.asarray(hour) + 1) // 2) % 12
+
+def pillar_index(stem_idx: np.ndarray, branch_idx: np.ndarray) -> np.ndarray:
+    """Combine stem and branch indices into sexagenary (JIA_ZI) indices.
+
+    Args:
+        stem_idx: Array of stem indices (0-9).
+        branch_idx: Array of branch indices (0-11) with matching parity.
+
+    Returns:
+        Array of sexagenary cycle indices (0-59).
+    """
+    return (6 * np.asarray(stem_idx) - 5 * np.asarray(branch_idx)) % 60
+
+def year_month_pillars(local_dt, utc_offsets, mode: str | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Calculate the year and month pillars for arrays of local datetimes.
+
+    Args:
+        local_dt: Array-like of naive local datetimes (datetime64 compatible).
+        utc_offsets: Array-like of UTC offsets in hours.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        Tuple of sexagenary index arrays (year, month).
+    """
+    local_dt = np.asarray(local_dt, dtype="datetime64[us]")
+    offset_us = np.rint(np.asarray(utc_offsets, dtype=np.float64) * _US_PER_HOUR).astype(np.int64)
+    return _year_month_from_jd(julian_day(local_dt - offset_us.astype("timedelta64[us]")), local_dt, mode)
+
+def _year_month_from_jd(jd: np.ndarray, local_dt: np.ndarray, mode: str | None) -> tuple[np.ndarray, np.ndarray]:
+    """year_month_pillars given the Julian day of each local datetime64[us]."""
+    # Solar year and month come from the solar term in effect (立春 opens the year)
+    mode = resolve_mode(mode)
+    table = _solar_term_array(mode)
+    pos = _term_positions(table, jd)
+    in_table = (pos >= 0) & (pos < len(table) - 1)
+    solar_year = FIRST_SOLAR_YEAR + pos // TERMS_PER_YEAR
+    m_branch_i = pos % TERMS_PER_YEAR // 2
+    if not in_table.all():
+        # Outside the precomputed table: fall back to the sun's longitude
+        out = ~in_table
+        if mode == FAST:
+            lon = sun_lon(jd[out])
+        else:
+            lon = np.array([solar_longitude(x, mode) for x in jd[out].tolist()])
+        year, month, _, _, _, _, _ = _calendar_fields(local_dt[out])
+        lon_branch_i = month_branch_idx(lon)
+        prev_year = (month <= 2) & (lon_branch_i >= 10)
+        m_branch_i[out] = lon_branch_i
+        solar_year[out] = np.where(prev_year, year - 1, year)
+
+    # Year pillar
+    y_stem_i = (solar_year - 4) % 10
+    y_branch_i = (solar_year - 4) % 12
+
+    # Month pillar
+    m_stem_i = (y_stem_i*2 + 2 + m_branch_i) % 10
+
+    return pillar_index(y_stem_i, y_branch_i), pillar_index(m_stem_i, (m_branch_i + 2) % 12)
+
+def day_hour_pillars(local_dt) -> tuple[np.ndarray, np.ndarray]:
+    """Calculate the day and hour pillars for arrays of local datetimes.
+
+    Args:
+        local_dt: Array-like of naive local datetimes (datetime64 compatible).
+
+    Returns:
+        Tuple of sexagenary index arrays (day, hour).
+    """
+    local_dt = np.asarray(local_dt, dtype="datetime64[us]")
+    days = local_dt.astype("datetime64[D]")
+
+    # Day pillar
+    offset = days.astype(np.int64) + (_ORD_UNIX_EPOCH - ORD_EPOCH)
+
+    # Hour pillar
+    h_branch_i = hour_branch_idx((local_dt - days).astype(np.int64) // _US_PER_HOUR)
+    h_stem_i = (2 * (offset % 10) + h_branch_i) % 10
+
+    return offset % 60, pillar_index(h_stem_i, h_branch_i)
+
+def four_pillars(local_dt, utc_offsets, mode: str | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Calculate the four pillars for arrays of local datetimes.
+
+    Args:
+        local_dt: Array-like of naive local datetimes (datetime64 compatible).
+        utc_offsets: Array-like of UTC offsets in hours.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        Tuple of sexagenary index arrays (year, month, day, hour).
+    """
+    return year_month_pillars(local_dt, utc_offsets, mode) + day_hour_pillars(local_dt)
+
+# ————————————————————————————————————————————————————
+# Strength/Element Scoring
+# ————————————————————————————————————————————————————
+def judge_strength(year_idx: np.ndarray, month_idx: np.ndarray, day_idx: np.ndarray, hour_idx: np.ndarray) -> np.ndarray:
+    """Score day master strength for arrays of charts.
+
+    Args:
+        year_idx: Array of year pillar sexagenary indices.
+        month_idx: Array of month pillar sexagenary indices.
+        day_idx: Array of day pillar sexagenary indices.
+        hour_idx: Array of hour pillar sexagenary indices.
+
+    Returns:
+        Array of numeric strength scores (>= 0 means "Strong").
+    """
+    dm = STEM_ELEM_IDX[np.asarray(day_idx) % 10]
+    return (
+        PILLAR_SUPPORT[dm, year_idx]
+        + PILLAR_SUPPORT[dm, month_idx] + SEASON_MATRIX[np.asarray(month_idx) % 12, dm]
+        + PILLAR_SUPPORT[dm, day_idx]
+        + PILLAR_SUPPORT[dm, hour_idx]
+    )
+
+def calculate_element_strengths(year_idx: np.ndarray, month_idx: np.ndarray, day_idx: np.ndarray, hour_idx: np.ndarray) -> np.ndarray:
+    """Calculate five-element strengths for arrays of charts.
+
+    Args:
+        year_idx: Array of year pillar sexagenary indices.
+        month_idx: Array of month pillar sexagenary indices.
+        day_idx: Array of day pillar sexagenary indices.
+        hour_idx: Array of hour pillar sexagenary indices.
+
+    Returns:
+        Array of shape (N, 5) with element totals, columns ordered as ELEMENTS.
+    """
+    totals = (
+        PILLAR_ELEMENTS[year_idx]
+        + MONTH_PILLAR_ELEMENTS[month_idx]
+        + DAY_PILLAR_ELEMENTS[day_idx]
+        + PILLAR_ELEMENTS[hour_idx]
+    )
+    return np.round(totals, 1)
+
+# ————————————————————————————————————————————————————
+# Main Batch API Function
+# ————————————————————————————————————————————————————
+def calculate_bazi_batch(dobs, birth_times, local_longitudes, utc_offsets, mode: str | None = None) -> dict[str, np.ndarray]:
+    """Calculate BaZi with solar time correction for arrays of births.
+
+    Batch counterpart of `bazi_calculator.calculate_bazi_with_solar_correction`;
+    row i of every output equals the scalar result for row i of the inputs.
+
+    Args:
+        dobs: Array-like of dates of birth (datetime64[D] compatible).
+        birth_times: Array-like of birth times (timedelta64 since midnight or `dt.time`).
+        local_longitudes: Array-like of local longitudes in degrees.
+        utc_offsets: Array-like of UTC offsets in hours.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        Dictionary of arrays: solar/standard datetimes, corrections, sexagenary
+        pillar indices (index into JIA_ZI), strength scores, a boolean "strong"
+        verdict and an (N, 5) "element_strengths" matrix ordered as ELEMENTS.
+    """
+    days = _as_dates(dobs)
+    day_numbers = days.astype(np.int64)
+    fields = _civil_from_days(day_numbers)
+    solar_dt, standard_dt, long_corr_min, EoT_min = _solar_correction(
+        days, fields[3], birth_times, local_longitudes, utc_offsets
+    )
+
+    # For traditional day calculation: flip day at 子时 (23:00–23:59)
+    zi_hour = (solar_dt - solar_dt.astype("datetime64[D]")).astype(np.int64) // _US_PER_HOUR == 23
+    solar_dt_bazi = np.where(zi_hour, solar_dt + np.timedelta64(1, "D"), solar_dt)
+
+    # Julian day of the solar instant in UTC, from the birth date's calendar fields
+    offset_us = np.rint(np.asarray(utc_offsets, dtype=np.float64) * _US_PER_HOUR).astype(np.int64)
+    utc_us = solar_dt.astype(np.int64) - offset_us
+    utc_days = utc_us // _US_PER_DAY
+    jd = _julian_day_from_fields(
+        *_shift_civil(fields, day_numbers, utc_days), *_clock_fields(utc_us - utc_days * _US_PER_DAY)
+    )
+
+    Y, M = _year_month_from_jd(jd, solar_dt, mode)
+    D, H = day_hour_pillars(solar_dt_bazi)
+
+    score, element_strengths = lookup_charts(Y, M, D, H)
+
+    return {
+        "standard_dt": standard_dt,
+        "solar_dt": solar_dt,
+        "longitude_correction_min": long_corr_min,
+        "EoT_min": EoT_min,
+        "year": Y.astype(np.int8),
+        "month": M.astype(np.int8),
+        "day": D.astype(np.int8),
+        "hour": H.astype(np.int8),
+        "strength_score": score,
+        "strong": score >= 0,
+        "element_strengths": element_strengths,
+    }
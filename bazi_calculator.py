@@ -1,10 +1,17 @@
 import datetime as dt
 import math
-from geopy.geocoders import Nominatim
-from timezonefinder import TimezoneFinder
-from zoneinfo import ZoneInfo
+from dataclasses import dataclass
+from functools import lru_cache
+from ephemeris import get_default_mode, resolve_mode, solar_longitude, sun_lon
+from solar_terms import julian_day, solar_term_at
+from chart_table import lookup_chart
+from country_index import CountryLocation, lookup_country
+from gazetteer import City, normalize_name, resolve_city
+from geocode_cache import GeocodedPlace, cached_geocode
+from tz_offsets import utc_offset_hours
+from ttl_cache import MISSING, TTLCache
 from bazi_constants import (
-    STEM, BRANCH, JIA_ZI, ORD_EPOCH, STEM_ELEM, BRANCH_ELEM, BRANCH_HIDDEN, SEASON_BONUS
+    STEM, BRANCH, JIA_ZI, ORD_EPOCH, ELEMENTS, STEM_ELEM, BRANCH_ELEM, BRANCH_HIDDEN, SEASON_BONUS
 )
 
 # ————————————————————————————————————————————————————
@@ -36,6 +43,12 @@ def longitude_correction(local_longitude: float, reference_longitude: float) ->
     """
     return (reference_longitude - local_longitude) * 4
 
+@lru_cache(maxsize=4096)
+def _solar_correction_stage(dob: dt.date, local_longitude: float, utc_offset: float) -> tuple[float, float]:
+    """Stage 1: longitude correction and equation of time (minutes) for a date and place."""
+    reference_longitude = utc_offset * 15  # 15° per hour of timezone
+    return longitude_correction(local_longitude, reference_longitude), equation_of_time(dob)
+
 def solar_corrected_time(dob: dt.date, birth_time: dt.time, local_longitude: float, utc_offset: float) -> tuple[dt.datetime, dt.datetime, float, float]:
     """Calculate solar time corrected datetime.
 
@@ -49,9 +62,7 @@ def solar_corrected_time(dob: dt.date, birth_time: dt.time, local_longitude: flo
         Tuple of (corrected datetime, naive local datetime, longitude correction in minutes, equation of time in minutes).
     """
     naive_local_dt = dt.datetime.combine(dob, birth_time)
-    reference_longitude = utc_offset * 15  # 15° per hour of timezone
-    long_corr_min = longitude_correction(local_longitude, reference_longitude)
-    EoT_min = equation_of_time(dob)
+    long_corr_min, EoT_min = _solar_correction_stage(dob, local_longitude, utc_offset)
     corrected_dt = naive_local_dt - dt.timedelta(minutes=long_corr_min) + dt.timedelta(minutes=EoT_min)
     return corrected_dt, naive_local_dt, long_corr_min, EoT_min
 
@@ -91,41 +102,6 @@ def get_pillar_hidden_stems(year_branch: str, month_branch: str, day_branch: str
 # ————————————————————————————————————————————————————
 # BaZi Calculation Core
 # ————————————————————————————————————————————————————
-def sun_lon(jd: float) -> float:
-    """Calculate the sun's longitude for a given Julian day.
-
-    Args:
-        jd: Julian day.
-
-    Returns:
-        Sun longitude in degrees.
-    """
-    T = (jd - 2451545.0) / 36525.0
-    L0 = (280.46646 + 36000.76983*T + 0.0003032*T*T) % 360
-    M  = (357.52911 + 35999.05029*T - 0.0001537*T*T) % 360
-    M  = math.radians(M)
-    C  = (1.914602 - 0.004817*T - 0.000014*T*T)*math.sin(M)
-    C += (0.019993 - 0.000101*T)*math.sin(2*M)
-    C += 0.000289*math.sin(3*M)
-    return (L0 + C) % 360
-
-def julian_day(utc: dt.datetime) -> float:
-    """Calculate the Julian day from a UTC datetime.
-
-    Args:
-        utc: UTC datetime.
-
-    Returns:
-        Julian day as float.
-    """
-    y, m = utc.year, utc.month
-    d = utc.day + (utc.hour + utc.minute/60 + utc.second/3600)/24
-    if m <= 2:
-        y, m = y - 1, m + 12
-    A = y // 100
-    B = 2 - A + A // 4
-    return int(365.25*(y+4716)) + int(30.6001*(m+1)) + d + B - 1524.5
-
 def month_branch_idx(lon: float) -> int:
     """Calculate the month branch index based on sun longitude.
 
@@ -149,46 +125,107 @@ def hour_branch_idx(hour: int) -> int:
     """
     return ((hour + 1) // 2) % 12
 
-def four_pillars(local_dt: dt.datetime, utc_offset: int) -> tuple[str, str, str, str]:
-    """Calculate the four pillars (year, month, day, hour) from local datetime.
+def pillar_index(stem_idx: int, branch_idx: int) -> int:
+    """Combine stem and branch indices into a sexagenary (JIA_ZI) index.
 
     Args:
-        local_dt: Local datetime with timezone info.
-        utc_offset: UTC offset in hours.
+        stem_idx: Stem index (0-9).
+        branch_idx: Branch index (0-11) with the same parity as the stem.
 
     Returns:
-        Tuple of four pillars as strings (year, month, day, hour).
+        Sexagenary cycle index (0-59).
     """
-    tz = dt.timezone(dt.timedelta(hours=utc_offset))
-    local_dt = local_dt.replace(tzinfo=tz)
-    utc_dt   = local_dt.astimezone(dt.timezone.utc)
-
-    # Year pillar
+    return (6 * stem_idx - 5 * branch_idx) % 60
+
+# The pipeline runs as memoized stages, each keyed only on its own inputs:
+#   1. solar correction   (date, longitude, offset)  -> minutes
+#   2. year/month pillars (UTC instant to the second) -> JD -> solar term
+#   3. day/hour pillars   (solar date, hour)          -> 子时 flip by day arithmetic
+#   4. scoring            (four pillar indices)       -> chart table row
+# Changing only the minute reuses stage 1; changing only the place reuses
+# stages 3-4 whenever the pillars come out the same.
+
+@lru_cache(maxsize=4096)
+def _year_month_stage(utc_dt: dt.datetime, utc_offset: float, mode: str) -> tuple[int, int]:
+    """Stage 2: year and month pillar indices for a UTC instant (second resolution)."""
+    # Solar year and month come from the solar term in effect (立春 opens the year)
     jd_current = julian_day(utc_dt)
-    lon = sun_lon(jd_current)
-    if (local_dt.month, local_dt.day) < (2, 4):
-        solar_year = local_dt.year - 1
+    term_pos = solar_term_at(jd_current, mode)
+    if term_pos is not None:
+        solar_year, term = term_pos
+        m_branch_i = term // 2
     else:
-        solar_year = local_dt.year
+        # Outside the precomputed table: fall back to the sun's longitude.
+        # 子/丑 months seen in January/February still belong to the previous solar year.
+        local_dt = utc_dt + dt.timedelta(hours=utc_offset)
+        m_branch_i = month_branch_idx(solar_longitude(jd_current, mode))
+        if local_dt.month <= 2 and m_branch_i >= 10:
+            solar_year = local_dt.year - 1
+        else:
+            solar_year = local_dt.year
+
+    # Year pillar
     y_stem_i   = (solar_year - 4) % 10
     y_branch_i = (solar_year - 4) % 12
-    year_p     = STEM[y_stem_i] + BRANCH[y_branch_i]
 
     # Month pillar
-    m_branch_i = month_branch_idx(lon)
     m_stem_i   = (y_stem_i*2 + 2 + m_branch_i) % 10
-    month_p = STEM[m_stem_i] + BRANCH[(m_branch_i + 2) % 12]
 
+    return pillar_index(y_stem_i, y_branch_i), pillar_index(m_stem_i, (m_branch_i + 2) % 12)
+
+@lru_cache(maxsize=4096)
+def _day_hour_stage(local_date: dt.date, hour: int, zi_flip: bool) -> tuple[int, int]:
+    """Stage 3: day and hour pillar indices, optionally flipping the day at 子时 (23:00)."""
     # Day pillar
-    offset     = local_dt.date().toordinal() - ORD_EPOCH
-    day_p      = JIA_ZI[offset % 60]
+    offset     = local_date.toordinal() - ORD_EPOCH + (zi_flip and hour == 23)
 
     # Hour pillar
-    h_branch_i = hour_branch_idx(local_dt.hour)
+    h_branch_i = hour_branch_idx(hour)
     h_stem_i   = (2 * (offset % 10) + h_branch_i) % 10
-    hour_p     = STEM[h_stem_i] + BRANCH[h_branch_i]
 
-    return year_p, month_p, day_p, hour_p
+    return offset % 60, pillar_index(h_stem_i, h_branch_i)
+
+@lru_cache(maxsize=65536)
+def _scoring_stage(year_idx: int, month_idx: int, day_idx: int, hour_idx: int) -> tuple[int, tuple[float, ...]]:
+    """Stage 4: strength score and element totals (ELEMENTS order) from the chart table."""
+    raw, element_strengths = lookup_chart(year_idx, month_idx, day_idx, hour_idx)
+    return raw, tuple(element_strengths[e] for e in ELEMENTS)
+
+def clear_stage_caches() -> None:
+    """Drop all memoized pipeline stages and results (e.g. after rebuilding the chart table)."""
+    for stage in (_solar_correction_stage, _year_month_stage, _day_hour_stage, _scoring_stage):
+        stage.cache_clear()
+    _result_cache.clear()
+
+def four_pillar_indices(local_dt: dt.datetime, utc_offset: float, mode: str | None = None) -> tuple[int, int, int, int]:
+    """Calculate the four pillars (year, month, day, hour) as sexagenary indices.
+
+    Args:
+        local_dt: Local datetime (naive, in the zone given by utc_offset).
+        utc_offset: UTC offset in hours.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        Tuple of four indices into JIA_ZI (year, month, day, hour).
+    """
+    utc_dt = (local_dt - dt.timedelta(hours=utc_offset)).replace(microsecond=0)
+    return (
+        *_year_month_stage(utc_dt, utc_offset, resolve_mode(mode)),
+        *_day_hour_stage(local_dt.date(), local_dt.hour, False),
+    )
+
+def four_pillars(local_dt: dt.datetime, utc_offset: float, mode: str | None = None) -> tuple[str, str, str, str]:
+    """Calculate the four pillars (year, month, day, hour) from local datetime.
+
+    Args:
+        local_dt: Local datetime (naive, in the zone given by utc_offset).
+        utc_offset: UTC offset in hours.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        Tuple of four pillars as strings (year, month, day, hour).
+    """
+    return tuple(JIA_ZI[i] for i in four_pillar_indices(local_dt, utc_offset, mode))
 
 # ————————————————————————————————————————————————————
 # Strength/Support Calculation Helpers (legacy style)
@@ -258,7 +295,7 @@ def calculate_element_strengths(vis_stems: list[str], hidden_stems_per_pillar: l
             - Dictionary mapping element to total strength score.
             - Dictionary with detailed breakdown per element.
     """
-    elements = ["Wood", "Fire", "Earth", "Metal", "Water"]
+    elements = ELEMENTS
     elem_score = {e: 0 for e in elements}
     breakdown = {}
     # Visible stems
@@ -296,10 +333,97 @@ def calculate_element_strengths(vis_stems: list[str], hidden_stems_per_pillar: l
         elem_score[e] = round(total, 1)
     return elem_score, breakdown
 
+# ————————————————————————————————————————————————————
+# Result Type
+# ————————————————————————————————————————————————————
+@dataclass(frozen=True, slots=True)
+class BaziResult:
+    """Compact BaZi calculation result.
+
+    Pillars are stored as sexagenary indices into JIA_ZI and scores as
+    numbers; display strings (pillar characters, hidden stems, score
+    breakdown) are derived only when a renderer asks for them.
+    """
+    standard_dt: dt.datetime
+    solar_dt: dt.datetime
+    longitude_correction_min: float
+    EoT_min: float
+    utc_offset: float
+    year_idx: int
+    month_idx: int
+    day_idx: int
+    hour_idx: int
+    strength_score: int
+    element_scores: tuple[float, float, float, float, float]
+
+    @property
+    def year(self) -> str:
+        return JIA_ZI[self.year_idx]
+
+    @property
+    def month(self) -> str:
+        return JIA_ZI[self.month_idx]
+
+    @property
+    def day(self) -> str:
+        return JIA_ZI[self.day_idx]
+
+    @property
+    def hour(self) -> str:
+        return JIA_ZI[self.hour_idx]
+
+    @property
+    def pillars(self) -> tuple[str, str, str, str]:
+        return self.year, self.month, self.day, self.hour
+
+    @property
+    def strength(self) -> str:
+        return "Strong" if self.strength_score >= 0 else "Weak"
+
+    @property
+    def hidden_stems(self) -> list[list[str]]:
+        return get_pillar_hidden_stems(*(p[1] for p in self.pillars))
+
+    @property
+    def element_strengths(self) -> dict[str, float]:
+        return dict(zip(ELEMENTS, self.element_scores))
+
+    @property
+    def element_score_breakdown(self) -> dict[str, dict[str, object]]:
+        """Per-element scoring breakdown with description strings (built on demand)."""
+        Y, M, D, H = self.pillars
+        _, breakdown = calculate_element_strengths(
+            [Y[0], M[0], D[0], H[0]], self.hidden_stems, M[1], D[0]
+        )
+        return breakdown
+
+    def to_dict(self) -> dict[str, object]:
+        """Return the legacy dictionary form of this result.
+
+        Returns:
+            Dictionary with the keys historically returned by
+            calculate_bazi_with_solar_correction.
+        """
+        return {
+            "standard_dt": self.standard_dt,
+            "solar_dt": self.solar_dt,
+            "longitude_correction_min": self.longitude_correction_min,
+            "EoT_min": self.EoT_min,
+            "year": self.year,
+            "month": self.month,
+            "day": self.day,
+            "hour": self.hour,
+            "strength": self.strength,
+            "strength_score": self.strength_score,
+            "hidden_stems": self.hidden_stems,
+            "element_strengths": self.element_strengths,
+            "element_score_breakdown": self.element_score_breakdown,
+        }
+
 # ————————————————————————————————————————————————————
 # Main API Function
 # ————————————————————————————————————————————————————
-def calculate_bazi_with_solar_correction(dob: dt.date, birth_time: dt.time, local_longitude: float, utc_offset: float) -> dict[str, object]:
+def calculate_bazi_with_solar_correction(dob: dt.date, birth_time: dt.time, local_longitude: float, utc_offset: float, mode: str | None = None) -> BaziResult:
     """Calculate BaZi with solar time correction.
 
     Args:
@@ -307,91 +431,166 @@ def calculate_bazi_with_solar_correction(dob: dt.date, birth_time: dt.time, loca
         birth_time: Time of birth.
         local_longitude: Local longitude in degrees.
         utc_offset: UTC offset in hours.
+        mode: Ephemeris engine ("fast"/"precise") used for solar-term
+            boundaries, or None for the global default.
 
     Returns:
-        Dictionary containing BaZi calculation results and metadata.
+        BaziResult with the pillars, scores and time metadata (use
+        `to_dict()` for the legacy dictionary form).
     """
     solar_dt, standard_dt, long_corr_min, EoT_min = solar_corrected_time(
         dob, birth_time, local_longitude, utc_offset
     )
 
-    # For traditional day calculation: flip day at 子时 (23:00–23:59)
-    if solar_dt.hour == 23:
-        solar_dt_bazi = solar_dt + dt.timedelta(days=1)
-    else:
-        solar_dt_bazi = solar_dt
+    # Year/month from the solar instant; day/hour flip the day at 子时 (23:00–23:59)
+    utc_dt = (solar_dt - dt.timedelta(hours=utc_offset)).replace(microsecond=0)
+    Y, M = _year_month_stage(utc_dt, utc_offset, resolve_mode(mode))
+    D, H = _day_hour_stage(solar_dt.date(), solar_dt.hour, True)
+
+    # Strength and element scores: a single read from the precomputed chart table
+    raw, element_scores = _scoring_stage(Y, M, D, H)
+
+    return BaziResult(
+        standard_dt=standard_dt,
+        solar_dt=solar_dt,
+        longitude_correction_min=long_corr_min,
+        EoT_min=EoT_min,
+        utc_offset=utc_offset,
+        year_idx=Y,
+        month_idx=M,
+        day_idx=D,
+        hour_idx=H,
+        strength_score=raw,
+        element_scores=element_scores,
+    )
 
-    # Calculate four pillars
-    Y, M, _, _ = four_pillars(solar_dt, int(utc_offset))
-    _, _, D, H = four_pillars(solar_dt_bazi, int(utc_offset))
+def _country_location(country: str, geocode_fallback: bool) -> tuple[CountryLocation | GeocodedPlace | None, bool]:
+    """Return the location of a country and whether it is the authoritative one.
 
-    # Get hidden stems for each pillar
-    hidden_stems_per_pillar = get_pillar_hidden_stems(
-        Y[1], M[1], D[1], H[1]
-    )
+    Geocoded index entries are used as they are. Zone.tab stand-ins (see
+    country_index) are replaced by the live geocode, which is what charts
+    have always used, and only serve when the geocoder fails.
 
-    vis_stems    = [Y[0], M[0], D[0], H[0]]
-    vis_branches = [Y[1], M[1], D[1], H[1]]
-    strength, raw = judge_strength(
-        day_stem=D[0],
-        month_branch=M[1],
-        vis_stems=vis_stems,
-        vis_branches=vis_branches
-    )
+    Returns:
+        Tuple of (location or None, authoritative); authoritative is False
+        when a stand-in was used because the geocoder failed.
 
-    # NEW: calculate element strengths
-    element_strengths, element_score_breakdown = calculate_element_strengths(
-        vis_stems, hidden_stems_per_pillar, M[1], D[0]
-    )
+    Raises:
+        Exception: Geocoder errors, if the country is not indexed at all.
+    """
+    location = lookup_country(country)
+    if not geocode_fallback or (location is not None and location.geocoded):
+        return location, True
+    try:
+        return cached_geocode(country) or location, True
+    except Exception:
+        if location is None:
+            raise
+        return location, False
+
+def resolve_location(country: str, city: str | None = None, geocode_fallback: bool = True) -> tuple[CountryLocation | City | GeocodedPlace | None, bool]:
+    """Resolve the birthplace used for a chart.
 
-    return {
-        "standard_dt": standard_dt,
-        "solar_dt": solar_dt,
-        "longitude_correction_min": long_corr_min,
-        "EoT_min": EoT_min,
-        "year": Y,
-        "month": M,
-        "day": D,
-        "hour": H,
-        "strength": strength,
-        "strength_score": raw,
-        "hidden_stems": hidden_stems_per_pillar,
-        "element_strengths": element_strengths,
-        "element_score_breakdown": element_score_breakdown,
-    }
-
-def compute_bazi_result(dob: dt.date, btime: dt.time, country: str) -> tuple[dict[str, object] | None, str]:
+    The city is looked up in the bundled gazetteer, then geocoded; a city
+    that cannot be placed falls back to the country (see _country_location).
+    The app, the API and batch_cli all place births through this function,
+    so the same inputs give the same chart everywhere.
+
+    Args:
+        country (str): Country name.
+        city (str | None): Optional city name.
+        geocode_fallback (bool): Whether to use the network geocoder.
+
+    Returns:
+        Tuple of (location or None, authoritative); authoritative is False
+        when the geocoder failed and a less precise location was used.
+
+    Raises:
+        Exception: Geocoder errors, if the country is not indexed at all.
+    """
+    city = city.strip() if city else ""
+    location, authoritative = None, True
+    if city:
+        location = resolve_city(city, country)
+        if location is None and geocode_fallback:
+            try:
+                location = cached_geocode(f"{city}, {country}")
+            except Exception:
+                authoritative = False   # geocoder down: the city may resolve later
+    if location is None:
+        location, country_authoritative = _country_location(country, geocode_fallback)
+        authoritative = authoritative and country_authoritative
+    return location, authoritative
+
+def _compute_bazi_result(dob: dt.date, btime: dt.time, country: str, city: str | None = None, geocode_fallback: bool = True) -> tuple[BaziResult | None, str, bool]:
+    """Uncached compute_bazi_result.
+
+    Returns:
+        Tuple of (BaziResult or None, timezone string or error message,
+        cacheable); results from a stand-in location are not cacheable.
+    """
+    try:
+        location, authoritative = resolve_location(country, city, geocode_fallback)
+        if location is None:
+            return None, "Country not found.", False
+        longitude, tz_str = location.longitude, location.timezone
+        utc_off = utc_offset_hours(tz_str, dt.datetime.combine(dob, btime))
+        result = calculate_bazi_with_solar_correction(dob, btime, longitude, utc_off)
+        return result, tz_str, authoritative
+    except Exception as err:
+        return None, f"Error: {err}", False
+
+# ————————————————————————————————————————————————————
+# Result Cache
+# ————————————————————————————————————————————————————
+# Results are shared across sessions, keyed by the normalized inputs plus the
+# ephemeris mode. BaziResult is frozen, so one instance can be handed to every
+# caller. Failures are not cached, so a place that could not be geocoded is
+# tried again on the next request; neither are charts computed from a
+# country's stand-in point while the geocoder was down.
+RESULT_CACHE_SIZE = 10_000
+RESULT_CACHE_TTL_S = 24 * 3600
+_result_cache = TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_S)
+
+def result_cache_stats() -> dict[str, int | float]:
+    """Return hit/miss statistics of the compute_bazi_result cache."""
+    return _result_cache.stats()
+
+def compute_bazi_result(dob: dt.date, btime: dt.time, country: str, city: str | None = None, geocode_fallback: bool = True) -> tuple[BaziResult | None, str]:
     """Compute BaZi result with geo lookup and timezone detection.
 
+    Locations come from the bundled city gazetteer when a city is given
+    (falling back to the country if the city cannot be placed), otherwise
+    from the bundled country index. Places missing from both, and
+    countries whose index entry is only a zone.tab stand-in, are geocoded
+    over the network through the persistent geocode cache.
+
     Args:
         dob: Date of birth.
         btime: Time of birth.
         country: Country name for geolocation.
+        city: Optional city of birth (matched within the country).
+        geocode_fallback: Geocode places that are not bundled.
 
     Returns:
-        Tuple of (result dictionary or None, timezone string or error message).
+        Tuple of (BaziResult or None, timezone string or error message).
+        Successful results are cached (see RESULT_CACHE_SIZE/RESULT_CACHE_TTL_S).
     """
-    try:
-        geolocator = Nominatim(user_agent="my_bazi_app", timeout=5)
-        tf = TimezoneFinder()
-        location = geolocator.geocode(country)
-        if not location:
-            return None, "Country not found."
-        tz_str = tf.timezone_at(lng=location.longitude, lat=location.latitude)
-        if not tz_str:
-            return None, "Could not determine timezone."
-        local_dt = dt.datetime.combine(dob, btime).replace(tzinfo=ZoneInfo(tz_str))
-        utc_off = local_dt.utcoffset().total_seconds() / 3600
-        result = calculate_bazi_with_solar_correction(dob, btime, location.longitude, utc_off)
-        return (result, tz_str)
-    except Exception as err:
-        return None, f"Error: {err}"
+    key = (dob, btime, " ".join(country.split()), normalize_name(city) if city else "",
+           geocode_fallback, get_default_mode())
+    cached = _result_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    result, tz_or_err, cacheable = _compute_bazi_result(dob, btime, country, city, geocode_fallback)
+    if cacheable:
+        _result_cache.put(key, (result, tz_or_err))
+    return result, tz_or_err
     
-def get_day_stem(bazi_dict: dict[str, object]) -> str:
-    """Extract the Heavenly-stem character of the Day pillar from BaZi dictionary.
+def get_day_stem(bazi_dict: BaziResult | dict[str, object]) -> str:
+    """Extract the Heavenly-stem character of the Day pillar from a BaZi result.
 
     Args:
-        bazi_dict: BaZi result dictionary.
+        bazi_dict: BaziResult or BaZi result dictionary.
 
     Returns:
         Day pillar stem character.
@@ -399,6 +598,8 @@ def get_day_stem(bazi_dict: dict[str, object]) -> str:
     Raises:
         KeyError: If day pillar not found in dictionary.
     """
+    if isinstance(bazi_dict, BaziResult):
+        return bazi_dict.day[0]
     if "day_pillar" in bazi_dict:
         return bazi_dict["day_pillar"][0]
     if "day" in bazi_dict:
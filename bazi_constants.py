@@ -10,6 +10,9 @@ BRANCH = "子丑寅卯辰巳午未申酉戌亥"
 JIA_ZI = [STEM[i % 10] + BRANCH[i % 12] for i in range(60)]
 ORD_EPOCH = dt.date(1899, 12, 22).toordinal()        # 甲子日
 
+# Five elements in canonical (productive cycle) order
+ELEMENTS = ["Wood", "Fire", "Earth", "Metal", "Water"]
+
 # Stem/branch to element
 STEM_ELEM   = ["Wood","Wood","Fire","Fire","Earth",
                "Earth","Metal","Metal","Water","Water"]
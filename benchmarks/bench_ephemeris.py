@@ -0,0 +1,118 @@
+"""Cost and accuracy of the solar position engines.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ephemeris [samples]
+
+For each engine this reports ns/call and its error, three ways:
+
+- longitude: the fast engine against the precise one at random instants over
+  1900-2100 (max and mean arc-seconds); the precise engine against Meeus'
+  worked example 25.b (apparent longitude on 1992 Oct 13.0 TD from the full
+  VSOP87). That is a single-point check, not an error bound.
+- solar terms: every equinox and solstice of 1900-2100 (804 instants) in the
+  engine's boundary table against Meeus' independent algorithm for them
+  (Astronomical Algorithms ch. 27, tables 27.B and 27.C; its own error is up
+  to about a minute), max and mean in seconds. Differences below that bound
+  cannot be told apart from the reference's error.
+- boundary table: build cost, and how far each engine's boundaries sit from
+  the precise engine's (minutes).
+"""
+import math
+import sys
+import time
+import numpy as np
+from ephemeris import ENGINES, PRECISE, delta_t
+from solar_terms import FIRST_SOLAR_YEAR, LAST_SOLAR_YEAR, TERMS_PER_YEAR, solar_term_table, _build_solar_term_table
+
+# Meeus, Astronomical Algorithms, example 25.b
+MEEUS_JDE = 2448908.5
+MEEUS_APPARENT_LON = 199 + 54/60 + 21.818/3600
+JD_1900 = 2415020.5
+JD_2100 = 2488069.5
+
+# Meeus, Astronomical Algorithms, chapter 27: mean equinox/solstice (table
+# 27.B, years 1000-3000) and periodic terms (table 27.C). Reproduces worked
+# example 27.a (June solstice 1962, JDE 2437837.39245).
+EQUINOX_TERMS = (3, 9, 15, 21)   # solar-term indices of the March equinox ... December solstice
+EQUINOX_MEAN = (
+    (2451623.80984, 365242.37404, 0.05169, -0.00411, -0.00057),
+    (2451716.56767, 365241.62603, 0.00325, 0.00888, -0.00030),
+    (2451810.21715, 365242.01767, -0.11575, 0.00337, 0.00078),
+    (2451900.05952, 365242.74049, -0.06223, -0.00823, 0.00032),
+)
+EQUINOX_PERIODIC = (
+    (485, 324.96, 1934.136), (203, 337.23, 32964.467), (199, 342.08, 20.186), (182, 27.85, 445267.112),
+    (156, 73.14, 45036.886), (136, 171.52, 22518.443), (77, 222.54, 65928.934), (74, 296.72, 3034.906),
+    (70, 243.58, 9037.513), (58, 119.81, 33718.147), (52, 297.17, 150.678), (50, 21.02, 2281.226),
+    (45, 247.54, 29929.562), (44, 325.15, 31555.956), (29, 60.93, 4443.417), (18, 155.12, 67555.328),
+    (17, 288.79, 4562.452), (16, 198.04, 62894.029), (14, 199.76, 31436.921), (12, 95.39, 14577.848),
+    (12, 287.11, 31931.756), (12, 320.81, 34777.259), (9, 227.73, 1222.114), (8, 15.45, 16859.074),
+)
+
+def meeus_equinox_jde(year: int, season: int) -> float:
+    """JDE of an equinox or solstice by Meeus ch. 27 (season 0 = March equinox)."""
+    Y = (year - 2000) / 1000
+    jde0 = sum(c * Y**i for i, c in enumerate(EQUINOX_MEAN[season]))
+    T = (jde0 - 2451545.0) / 36525
+    W = math.radians(35999.373*T - 2.47)
+    d_lambda = 1 + 0.0334*math.cos(W) + 0.0007*math.cos(2*W)
+    S = sum(A * math.cos(math.radians(B + C*T)) for A, B, C in EQUINOX_PERIODIC)
+    return jde0 + 0.00001 * S / d_lambda
+
+def equinox_errors_s(table: list[float]) -> np.ndarray:
+    """Signed differences (seconds) of a boundary table's equinoxes and solstices from Meeus ch. 27."""
+    errors = []
+    for year in range(FIRST_SOLAR_YEAR, LAST_SOLAR_YEAR + 1):
+        for season, term in enumerate(EQUINOX_TERMS):
+            jde = meeus_equinox_jde(year, season)
+            reference_ut = jde - delta_t(2000 + (jde - 2451545.0) / 365.25) / 86400
+            errors.append((table[(year - FIRST_SOLAR_YEAR) * TERMS_PER_YEAR + term] - reference_ut) * 86400)
+    return np.array(errors)
+
+def ns_per_call(fn, jds: list[float]) -> float:
+    """Time fn over jds and return nanoseconds per call."""
+    t0 = time.perf_counter_ns()
+    for jd in jds:
+        fn(jd)
+    return (time.perf_counter_ns() - t0) / len(jds)
+
+def arcsec_diff(a: float, b: float) -> float:
+    """Absolute angular difference in arc-seconds."""
+    return abs((a - b + 180) % 360 - 180) * 3600
+
+def main() -> None:
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    jds = np.random.default_rng(3).uniform(JD_1900, JD_2100, samples).tolist()
+    reference = [ENGINES[PRECISE](jd) for jd in jds]
+
+    meeus_jd = MEEUS_JDE - delta_t(1992.78) / 86400
+    print(f"{'mode':<10}{'ns/call':>10}{'max err (arcsec)':>20}{'mean err (arcsec)':>20}  reference")
+    for mode, fn in ENGINES.items():
+        cost = ns_per_call(fn, jds)
+        if mode == PRECISE:
+            err = arcsec_diff(fn(meeus_jd), MEEUS_APPARENT_LON)
+            print(f"{mode:<10}{cost:>10.0f}{err:>20.2f}{'-':>20}  Meeus 25.b (single point)")
+        else:
+            errs = [arcsec_diff(fn(jd), r) for jd, r in zip(jds, reference)]
+            print(f"{mode:<10}{cost:>10.0f}{max(errs):>20.2f}{sum(errs) / len(errs):>20.2f}  precise, {samples:,} instants")
+
+    print()
+    print(f"{'mode':<10}{'max err (s)':>12}{'mean err (s)':>14}{'mean signed (s)':>17}  vs Meeus ch. 27 equinoxes/solstices 1900-2100")
+    for mode in ENGINES:
+        errors = equinox_errors_s(solar_term_table(mode))
+        print(f"{mode:<10}{np.abs(errors).max():>12.1f}{np.abs(errors).mean():>14.1f}{errors.mean():>17.1f}  ({len(errors)} instants)")
+
+    print()
+    print(f"{'mode':<10}{'table build (s)':>16}{'max boundary shift vs precise (min)':>38}")
+    precise_table = np.asarray(solar_term_table(PRECISE))
+    for mode in ENGINES:
+        _build_solar_term_table.cache_clear()
+        t0 = time.perf_counter()
+        table = np.asarray(solar_term_table(mode))
+        build = time.perf_counter() - t0
+        shift = np.abs(table - precise_table).max() * 24 * 60
+        print(f"{mode:<10}{build:>16.3f}{shift:>38.1f}")
+
+if __name__ == "__main__":
+    main()
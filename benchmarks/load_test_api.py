@@ -0,0 +1,110 @@
+"""Load-test the chart API over keep-alive connections.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test_api [concurrency] [requests] [url]
+
+Without a url an API server is started in-process on a free port. Each
+simulated client holds one HTTP/1.1 keep-alive connection and sends its
+requests back to back; a mix of random births exercises /v1/solar-chart
+plus /v1/chart for a handful of countries (cached after the first call).
+Reports throughput and p50/p90/p99 latency.
+"""
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+COUNTRIES = ["Malaysia", "Singapore", "China", "United States", "India", "Nepal"]
+
+def random_payload(rng: random.Random) -> tuple[str, dict]:
+    """A random (path, body) request."""
+    dob = f"{rng.randint(1901, 2099)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    btime = f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+    if rng.random() < 0.5:
+        return "/v1/chart", {"dob": dob, "time": btime, "country": rng.choice(COUNTRIES)}
+    return "/v1/solar-chart", {"dob": dob, "time": btime, "longitude": rng.uniform(-180, 180),
+                               "utc_offset": rng.choice([-5, 0, 5.5, 8, 9])}
+
+async def _client(host: str, port: int, n: int, seed: int, latencies: list[float], errors: list[int]) -> None:
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n):
+            path, body = random_payload(rng)
+            data = json.dumps(body).encode()
+            request = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(data)}\r\nConnection: keep-alive\r\n\r\n").encode() + data
+            t0 = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            if status_line.split()[1] != b"200":
+                errors.append(int(status_line.split()[1]))
+    finally:
+        writer.close()
+
+async def run_load(host: str, port: int, concurrency: int, requests: int) -> tuple[list[float], list[int], float]:
+    """Send `requests` requests over `concurrency` connections.
+
+    Returns:
+        Tuple of (latencies in seconds, non-200 statuses, elapsed seconds).
+    """
+    latencies, errors = [], []
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, n, i, latencies, errors) for i, n in enumerate(per_client)))
+    return latencies, errors, time.perf_counter() - t0
+
+def start_local_server() -> tuple[str, int]:
+    """Start the API in a background thread and wait until it accepts connections."""
+    import uvicorn
+    from api_server import KEEP_ALIVE_S, app
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, timeout_keep_alive=KEEP_ALIVE_S, log_level="warning")
+    threading.Thread(target=uvicorn.Server(config).run, daemon=True).start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return "127.0.0.1", port
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("API server did not start")
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def main() -> None:
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    if len(sys.argv) > 3:
+        url = urlsplit(sys.argv[3])
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = start_local_server()
+
+    asyncio.run(run_load(host, port, min(concurrency, 4), 200))   # warm-up
+    latencies, errors, elapsed = asyncio.run(run_load(host, port, concurrency, requests))
+    latencies.sort()
+    print(f"requests:      {len(latencies):,}  ({concurrency} keep-alive connections)")
+    print(f"errors:        {len(errors):,}" + (f"  (statuses {sorted(set(errors))})" if errors else ""))
+    print(f"throughput:    {len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency p50:   {percentile(latencies, 0.50) * 1e3:.2f} ms")
+    print(f"latency p90:   {percentile(latencies, 0.90) * 1e3:.2f} ms")
+    print(f"latency p99:   {percentile(latencies, 0.99) * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Check app import times against a startup budget.
+
+Run from the repository root:
+
+    python -m benchmarks.startup_budget [runs]
+
+Each entry point is imported in a fresh interpreter under `python -X
+importtime`, and the self times of every imported module are summed. The
+cost of `import streamlit` (which every page pays and we cannot shrink) is
+measured the same way and subtracted, so the budget covers only our own
+modules and what they pull in. The best of several runs is reported to damp
+noise. An entry point fails if it goes over its budget or imports a
+dependency that must stay lazy. The exit status is 1 if any entry fails,
+so this can run in CI.
+"""
+import re
+import subprocess
+import sys
+
+BASELINE = "import streamlit"
+# name: (import statement, budget in ms over the streamlit baseline, modules that must not load)
+ENTRY_POINTS = {
+    "static pages": (
+        "import display_helpers",
+        25, ("gspread", "oauth2client", "pycountry", "pytz", "geopy", "timezonefinder", "numpy"),
+    ),
+    "main page": (
+        "import display_helpers, storage, geo_services, bazi_constants, product_constants",
+        25, ("gspread", "oauth2client", "pycountry", "pytz", "geopy", "timezonefinder", "numpy"),
+    ),
+    "chart engine": (
+        "import bazi_calculator",
+        120, ("gspread", "oauth2client", "pycountry", "pytz", "geopy", "timezonefinder"),
+    ),
+}
+TOP_MODULES = 5
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def import_profile(statement: str) -> dict[str, int]:
+    """Return {module: self time in µs} for a statement run in a fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                          capture_output=True, text=True, check=True)
+    return {m.group(4): int(m.group(1)) for m in map(_LINE.match, proc.stderr.splitlines()) if m}
+
+def best_profile(statement: str, runs: int) -> dict[str, int]:
+    """Import profile of the fastest of `runs` runs."""
+    return min((import_profile(statement) for _ in range(runs)), key=lambda p: sum(p.values()))
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    baseline = best_profile(BASELINE, runs)
+    print(f"baseline ({BASELINE}): {sum(baseline.values()) / 1e3:.0f} ms")
+
+    failed = False
+    for name, (statement, budget_ms, forbidden) in ENTRY_POINTS.items():
+        profile = best_profile(statement, runs)
+        extra = {module: us for module, us in profile.items() if module not in baseline}
+        cost_ms = sum(extra.values()) / 1e3
+        leaked = sorted({module.split(".")[0] for module in profile} & set(forbidden))
+        ok = cost_ms <= budget_ms and not leaked
+        failed |= not ok
+        print(f"\n{name:14s} {cost_ms:7.1f} ms / {budget_ms} ms budget  {'ok' if ok else 'FAIL'}")
+        if leaked:
+            print(f"  loads lazy dependencies: {', '.join(leaked)}")
+        for module, us in sorted(extra.items(), key=lambda item: -item[1])[:TOP_MODULES]:
+            print(f"  {us / 1e3:7.1f} ms  {module}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import os
+import sys
+import tempfile
+from functools import lru_cache
+import numpy as np
+from bazi_constants import ELEMENTS
+
+# Exhaustive score table for every reachable chart.
+#
+# The year stem fixes the month stem and the day stem fixes the hour stem, so
+# a chart is fully determined by (year pillar, month branch, day pillar, hour
+# branch): 60 x 12 x 60 x 12 = 518,400 rows. Each row stores the strength score
+# followed by the five element totals in half-points (all totals are multiples
+# of 0.5), as int8 — about 3 MB on disk, memory-mapped read-only so every
+# Streamlit worker process shares the same pages.
+
+CHART_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "chart_scores.npy")
+CHART_COUNT = 60 * 12 * 60 * 12
+
+# ————————————————————————————————————————————————————
+# Table Keys
+# ————————————————————————————————————————————————————
+def chart_key(year_idx: int, month_idx: int, day_idx: int, hour_idx: int) -> int:
+    """Return the table row for a chart given its sexagenary pillar indices.
+
+    Only the branch of the month and hour pillars is used; their stems follow
+    from the year and day stems.
+
+    Args:
+        year_idx: Year pillar index into JIA_ZI (0-59).
+        month_idx: Month pillar index into JIA_ZI (0-59).
+        day_idx: Day pillar index into JIA_ZI (0-59).
+        hour_idx: Hour pillar index into JIA_ZI (0-59).
+
+    Returns:
+        Row index into the chart table.
+    """
+    return ((year_idx * 12 + month_idx % 12) * 60 + day_idx) * 12 + hour_idx % 12
+
+def _all_charts() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Enumerate the pillar indices of every reachable chart in table order."""
+    from bazi_batch import pillar_index
+    year_idx, month_branch, day_idx, hour_branch = np.indices((60, 12, 60, 12)).reshape(4, -1)
+    # Month pillar: stem follows the year stem (寅 month = branch 2 starts the cycle)
+    m_from_yin = (month_branch - 2) % 12
+    month_idx = pillar_index((year_idx % 10 * 2 + 2 + m_from_yin) % 10, month_branch)
+    # Hour pillar: stem follows the day stem
+    hour_idx = pillar_index((2 * (day_idx % 10) + hour_branch) % 10, hour_branch)
+    return year_idx, month_idx, day_idx, hour_idx
+
+# ————————————————————————————————————————————————————
+# Build / Load
+# ————————————————————————————————————————————————————
+def compute_chart_table() -> np.ndarray:
+    """Compute strength and element scores for every reachable chart (about 0.25 s).
+
+    Returns:
+        int8 array of shape (CHART_COUNT, 6).
+    """
+    # Build-time only: bazi_batch imports bazi_calculator, which reads this table
+    from bazi_batch import calculate_element_strengths, judge_strength
+
+    Y, M, D, H = _all_charts()
+    table = np.empty((CHART_COUNT, 1 + len(ELEMENTS)), dtype=np.int8)
+    table[:, 0] = judge_strength(Y, M, D, H)
+    table[:, 1:] = np.rint(calculate_element_strengths(Y, M, D, H) * 2)
+    return table
+
+def build_chart_table(path: str = CHART_TABLE_PATH) -> str:
+    """Precompute the chart table into a file (run at deploy: python chart_table.py).
+
+    The file is written to a temporary name and renamed into place, so
+    concurrent builders never expose a partial table.
+
+    Args:
+        path: Destination .npy path.
+
+    Returns:
+        The path written.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    table = compute_chart_table()
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npy.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, table)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+@lru_cache(maxsize=None)
+def load_chart_table(path: str = CHART_TABLE_PATH) -> np.ndarray:
+    """Memory-map the chart table, building it first if it does not exist.
+
+    If the file is missing and cannot be written (e.g. a read-only deploy
+    directory), the table is computed in memory for this process instead.
+
+    Args:
+        path: Path of the .npy table.
+
+    Returns:
+        Read-only int8 array of shape (CHART_COUNT, 6).
+    """
+    if not os.path.exists(path):
+        try:
+            build_chart_table(path)
+        except OSError:
+            table = compute_chart_table()
+            table.flags.writeable = False
+            return table
+    return np.load(path, mmap_mode="r")
+
+# ————————————————————————————————————————————————————
+# Lookup
+# ————————————————————————————————————————————————————
+def lookup_chart(year_idx: int, month_idx: int, day_idx: int, hour_idx: int) -> tuple[int, dict[str, float]]:
+    """Read the precomputed scores of a chart.
+
+    Args:
+        year_idx: Year pillar index into JIA_ZI (0-59).
+        month_idx: Month pillar index into JIA_ZI (0-59).
+        day_idx: Day pillar index into JIA_ZI (0-59).
+        hour_idx: Hour pillar index into JIA_ZI (0-59).
+
+    Returns:
+        Tuple of (strength score, mapping of element to total strength).
+    """
+    row = load_chart_table()[chart_key(year_idx, month_idx, day_idx, hour_idx)].tolist()
+    return row[0], {e: v / 2 for e, v in zip(ELEMENTS, row[1:])}
+
+def lookup_charts(year_idx: np.ndarray, month_idx: np.ndarray, day_idx: np.ndarray, hour_idx: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Read the precomputed scores of many charts at once.
+
+    Args:
+        year_idx: Array of year pillar indices.
+        month_idx: Array of month pillar indices.
+        day_idx: Array of day pillar indices.
+        hour_idx: Array of hour pillar indices.
+
+    Returns:
+        Tuple of (strength scores, (N, 5) element totals ordered as ELEMENTS).
+    """
+    rows = load_chart_table()[chart_key(
+        np.asarray(year_idx, dtype=np.int64), np.asarray(month_idx, dtype=np.int64),
+        np.asarray(day_idx, dtype=np.int64), np.asarray(hour_idx, dtype=np.int64),
+    )]
+    return rows[:, 0], rows[:, 1:] / 2
+
+if __name__ == "__main__":
+    print(f"Wrote {build_chart_table(sys.argv[1] if len(sys.argv) > 1 else CHART_TABLE_PATH)}")
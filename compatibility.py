@@ -0,0 +1,166 @@
+from typing import Iterable, Sequence
+import numpy as np
+from bazi_calculator import BaziResult, support_value
+from bazi_constants import ELEMENTS
+
+# Element compatibility between two profiles.
+#
+# support_value(a, b) scores how element b treats element a (+1 same or
+# producing, -1 controlling or draining, 0 otherwise). Scoring a pair in
+# both directions and averaging gives the symmetric kernel
+#
+#     K[i, j] = (support_value(E_i, E_j) + support_value(E_j, E_i)) / 2
+#
+# and compatibility(x, y) = p(x) · K · p(y), where p() turns a five-element
+# strength vector into proportions (negative totals clipped to 0). Scores
+# lie in [-0.5, 1]: 1 for identical single-element profiles, -0.5 for a
+# pure controlling pair.
+
+COMPATIBILITY_KERNEL = np.array(
+    [[(support_value(a, b) + support_value(b, a)) / 2 for b in ELEMENTS] for a in ELEMENTS],
+    dtype=np.float32,
+)
+# Score blocks are capped at this many float32 cells (64 MiB)
+MAX_BLOCK_CELLS = 1 << 24
+
+def element_proportions(vectors: np.ndarray) -> np.ndarray:
+    """Normalize five-element strength vectors into proportions.
+
+    Args:
+        vectors: Array of shape (N, 5) in ELEMENTS order.
+
+    Returns:
+        float32 array of shape (N, 5) whose rows sum to 1 (all-zero rows stay zero).
+    """
+    clipped = np.clip(np.asarray(vectors, dtype=np.float32), 0, None)
+    totals = clipped.sum(axis=1, keepdims=True)
+    return np.divide(clipped, totals, out=np.zeros_like(clipped), where=totals > 0)
+
+class CompatibilityIndex:
+    """Pairwise element compatibility over a fixed set of profiles.
+
+    Profiles are held as an (N, 5) float32 matrix. Top-k searches score one
+    block of rows against all profiles at a time and never materialize the
+    N x N matrix; memory stays bounded by MAX_BLOCK_CELLS.
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: Sequence[object] | None = None) -> None:
+        """Build the index.
+
+        Args:
+            vectors: Five-element strength vectors, shape (N, 5) in ELEMENTS order
+                (e.g. BaziResult.element_scores or the batch "element_strengths").
+            ids: Optional user identifiers, one per row.
+
+        Raises:
+            ValueError: If the shapes do not match.
+        """
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2 or vectors.shape[1] != len(ELEMENTS):
+            raise ValueError(f"Expected shape (N, {len(ELEMENTS)}), got {vectors.shape}")
+        if ids is not None and len(ids) != len(vectors):
+            raise ValueError("ids must have one entry per vector")
+        self.ids = list(ids) if ids is not None else None
+        self.profiles = element_proportions(vectors)
+        # Right-hand side of the bilinear form, precomputed once
+        self._weighted = self.profiles @ COMPATIBILITY_KERNEL
+
+    @classmethod
+    def from_results(cls, results: Iterable[BaziResult], ids: Sequence[object] | None = None) -> "CompatibilityIndex":
+        """Build an index from calculator results."""
+        return cls(np.array([r.element_scores for r in results], dtype=np.float32), ids)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def score(self, i: int, j: int) -> float:
+        """Return the compatibility of profiles i and j."""
+        return float(self._weighted[i] @ self.profiles[j])
+
+    def scores_for(self, vector: Sequence[float]) -> np.ndarray:
+        """Score one five-element vector against every profile.
+
+        Returns:
+            float32 array of shape (N,).
+        """
+        profile = element_proportions(np.asarray(vector).reshape(1, -1))[0]
+        return self.profiles @ (COMPATIBILITY_KERNEL @ profile)
+
+    def query(self, vector: Sequence[float], k: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        """Return the k best-matching profiles for an outside vector.
+
+        Returns:
+            Tuple of (row indices, scores), best first.
+        """
+        scores = self.scores_for(vector)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k else np.empty(0, dtype=np.intp)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top, scores[top]
+
+    def top_k(self, k: int = 10, block_rows: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Return the k best matches for every profile, excluding itself.
+
+        Users with identical element proportions share their candidates, so
+        blocks are scored over the distinct profiles only and then expanded
+        to users.
+
+        Args:
+            k: Matches per profile (capped at N - 1).
+            block_rows: Distinct profiles scored per block; defaults to fit MAX_BLOCK_CELLS.
+
+        Returns:
+            Tuple of (indices, scores), each of shape (N, k), best first.
+        """
+        n = len(self)
+        k = max(0, min(k, n - 1))
+        if k == 0:
+            return np.empty((n, 0), dtype=np.intp), np.empty((n, 0), dtype=np.float32)
+
+        unique, inverse, counts = np.unique(self.profiles, axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+        members = np.argsort(inverse, kind="stable")
+        member_start = np.concatenate(([0], np.cumsum(counts)))
+        u = len(unique)
+        # k + 1 candidates per distinct profile leaves k once a user drops itself
+        width = k + 1
+        top_unique = min(width, u)
+        weighted = unique @ COMPATIBILITY_KERNEL
+        unique_t = np.ascontiguousarray(unique.T)
+        block_rows = block_rows or max(1, MAX_BLOCK_CELLS // u)
+
+        cand_idx = np.empty((u, width), dtype=np.intp)
+        cand_scores = np.empty((u, width), dtype=np.float32)
+        for start in range(0, u, block_rows):
+            block = weighted[start:start + block_rows] @ unique_t
+            top = np.argpartition(-block, top_unique - 1, axis=1)[:, :top_unique]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            # Expand distinct profiles to their member users, best first
+            for row, (ids, row_scores) in enumerate(zip(top, top_scores)):
+                picked = np.concatenate([members[member_start[t]:member_start[t + 1]] for t in ids])[:width]
+                picked_counts = np.minimum(counts[ids], width)
+                cand_idx[start + row] = picked
+                cand_scores[start + row] = np.repeat(row_scores, picked_counts)[:width]
+
+        # Per user: move itself (if present) to the end, then keep k
+        user_idx = cand_idx[inverse]
+        user_scores = cand_scores[inverse]
+        order = np.argsort(user_idx == np.arange(n)[:, None], axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(user_idx, order, axis=1), np.take_along_axis(user_scores, order, axis=1)
+
+    def top_k_ids(self, k: int = 10) -> dict[object, list[tuple[object, float]]]:
+        """Return top-k matches keyed by user id (requires ids).
+
+        Raises:
+            ValueError: If the index was built without ids.
+        """
+        if self.ids is None:
+            raise ValueError("Index was built without ids")
+        indices, scores = self.top_k(k)
+        return {
+            self.ids[i]: [(self.ids[j], float(s)) for j, s in zip(indices[i], scores[i])]
+            for i in range(len(self))
+        }
@@ -0,0 +1,193 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import zoneinfo
+from functools import lru_cache
+from typing import NamedTuple
+
+# Bundled country -> (latitude, longitude, IANA timezone) index.
+#
+# The birth form only offers pycountry country names, so every location the
+# app geocodes is one of ~250 fixed strings. The index is built once (see
+# build_country_index) and shipped in data/country_index.json; lookups are a
+# dict access. Two sources are supported when building:
+#
+#   geocode — the point Nominatim returns for the country name plus
+#             TimezoneFinder, i.e. exactly what compute_bazi_result used to
+#             fetch live (rate-limited to one request per second);
+#   zone.tab — the principal city of the country's main IANA zone, read from
+#             the local tz database. Works offline and is used for any
+#             country the geocoder cannot resolve.
+#
+# Each entry records its source. Only geocoded entries reproduce what the
+# live lookup returned (the geocoder's centroid: about 104.2E for China,
+# where zone.tab has Shanghai at 121.5E), so compute_bazi_result treats
+# zone.tab entries as a stand-in: it still geocodes those countries and only
+# uses the bundled point when the geocoder is unavailable.
+
+COUNTRY_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "country_index.json")
+GEOCODE_INTERVAL_S = 1.0            # Nominatim usage policy: max 1 request/second
+SOURCE_GEOCODE = "geocode"
+SOURCE_ZONE_TAB = "zone.tab"
+
+# Main zone for countries whose first zone.tab entry is not the capital's zone
+_PREFERRED_ZONES = {
+    "AU": "Australia/Sydney",
+    "BR": "America/Sao_Paulo",
+    "CA": "America/Toronto",
+    "FM": "Pacific/Pohnpei",
+    "RU": "Europe/Moscow",
+    "UA": "Europe/Kyiv",
+    "UZ": "Asia/Tashkent",
+}
+
+class CountryLocation(NamedTuple):
+    """Representative location of a country."""
+    latitude: float
+    longitude: float
+    timezone: str
+    source: str = SOURCE_ZONE_TAB
+
+    @property
+    def geocoded(self) -> bool:
+        """True if this is the point the live geocoder returns for the country."""
+        return self.source == SOURCE_GEOCODE
+
+# ————————————————————————————————————————————————————
+# Lookup
+# ————————————————————————————————————————————————————
+@lru_cache(maxsize=4)
+def load_country_index(path: str = COUNTRY_INDEX_PATH) -> dict[str, CountryLocation]:
+    """Load the country index (once per process).
+
+    Args:
+        path: Location of the JSON index.
+
+    Returns:
+        Mapping of country name to CountryLocation (empty if the file is missing).
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {name: CountryLocation(*entry) for name, entry in raw.items()}
+
+def lookup_country(name: str) -> CountryLocation | None:
+    """Return the bundled location of a country, or None if it is not indexed.
+
+    Args:
+        name: Country name as listed by pycountry.
+
+    Returns:
+        CountryLocation or None.
+    """
+    return load_country_index().get(name)
+
+# ————————————————————————————————————————————————————
+# Build
+# ————————————————————————————————————————————————————
+def parse_iso6709(coord: str) -> tuple[float, float]:
+    """Parse zone.tab coordinates (±DDMM[SS]±DDDMM[SS]) into (latitude, longitude)."""
+    split = max(coord.rfind("+"), coord.rfind("-"))
+    values = []
+    for part, deg_digits in ((coord[:split], 2), (coord[split:], 3)):
+        sign = -1 if part[0] == "-" else 1
+        digits = part[1:]
+        degrees = int(digits[:deg_digits])
+        minutes = int(digits[deg_digits:deg_digits + 2])
+        seconds = int(digits[deg_digits + 2:] or 0)
+        values.append(sign * (degrees + minutes / 60 + seconds / 3600))
+    return values[0], values[1]
+
+def zone_tab_path() -> str:
+    """Return the path of the local tz database's zone.tab.
+
+    Raises:
+        FileNotFoundError: If no directory on zoneinfo.TZPATH has one.
+    """
+    for base in zoneinfo.TZPATH:
+        path = os.path.join(base, "zone.tab")
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError("zone.tab not found on zoneinfo.TZPATH")
+
+def _zone_tab_locations() -> dict[str, CountryLocation]:
+    """Map ISO alpha-2 codes to the principal city of their main zone (local tz database)."""
+    zones = {}
+    with open(zone_tab_path(), encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            code, coord, tz = line.rstrip("\n").split("\t")[:3]
+            zones.setdefault(code, {})[tz] = parse_iso6709(coord)
+    locations = {}
+    for code, by_tz in zones.items():
+        tz = _PREFERRED_ZONES.get(code, next(iter(by_tz)))
+        lat, lon = by_tz[tz]
+        locations[code] = CountryLocation(round(lat, 4), round(lon, 4), tz, SOURCE_ZONE_TAB)
+    return locations
+
+def _geocode_locations(names: list[str]) -> dict[str, CountryLocation]:
+    """Geocode country names the way compute_bazi_result used to (network required)."""
+    from geo_services import geocode, timezone_at
+
+    locations = {}
+    for name in names:
+        started = time.monotonic()
+        try:
+            location = geocode(name)
+        except Exception as err:
+            print(f"  {name}: geocoder error ({err})", file=sys.stderr)
+            location = None
+        if location:
+            tz = timezone_at(lng=location.longitude, lat=location.latitude)
+            if tz:
+                locations[name] = CountryLocation(round(location.latitude, 4), round(location.longitude, 4), tz, SOURCE_GEOCODE)
+        time.sleep(max(0.0, GEOCODE_INTERVAL_S - (time.monotonic() - started)))
+    return locations
+
+def build_country_index(path: str = COUNTRY_INDEX_PATH, geocode: bool = False) -> str:
+    """Build the country index for every pycountry country name.
+
+    Args:
+        path: Output JSON path (written atomically).
+        geocode: Query Nominatim for each country (about four minutes);
+            zone.tab is used for countries it cannot resolve. Without it,
+            every entry is a zone.tab stand-in.
+
+    Returns:
+        The path written.
+    """
+    import pycountry
+    names = sorted(c.name for c in pycountry.countries)
+    by_code = _zone_tab_locations()
+    geocoded = _geocode_locations(names) if geocode else {}
+    index = {}
+    for country in sorted(pycountry.countries, key=lambda c: c.name):
+        location = geocoded.get(country.name) or by_code.get(country.alpha_2)
+        if location is None:
+            print(f"  {country.name}: no location", file=sys.stderr)
+            continue
+        index[country.name] = list(location)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            # One country per line keeps diffs of rebuilt indexes readable
+            f.write("{\n")
+            f.write(",\n".join(f"{json.dumps(name, ensure_ascii=False)}: {json.dumps(entry)}" for name, entry in index.items()))
+            f.write("\n}\n")
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    load_country_index.cache_clear()
+    return path
+
+if __name__ == "__main__":
+    print(f"Wrote {build_country_index(geocode='--geocode' in sys.argv[1:])}")
@@ -1,13 +1,17 @@
+from __future__ import annotations
 import random
 import datetime as dt
-import pycountry
-import pytz
+from typing import TYPE_CHECKING
 import streamlit as st
 import streamlit.components.v1 as components
-from gsheet_helpers import append_to_gsheet, is_valid_email, make_unique_key, append_survey_response
+from gsheet_helpers import is_valid_email, make_unique_key
+from storage import save_lead
 from bazi_constants import ELEMENT_EMOJIS, ELEMENT_COLORS, BG_GRADIENT, ELEMENT_SHADOW, SUPPORT_EMAIL
 from ui_constants import LOGO_ICON_PATH, HERO_IMAGE_PATH, CAREER_IMAGE_PATH, GROWTH_IMAGE_PATH, RELATIONSHIP_IMAGE_PATH, IDENTITY_COLORS, FEATURE_CARDS, SOCIAL_LINKS
 
+if TYPE_CHECKING:
+    from bazi_calculator import BaziResult   # annotations only; pages without charts skip the engine
+
 # --- Emoji faces for accuracy survey ---
 ACCURACY_FACES = {
     1: "😞",
@@ -200,26 +204,45 @@ def display_all_feature_cards(callback):
 
 def display_main_input_form():
     """
-    Displays the main input form for the user to enter their name, gender, country of birth, date of birth, and birth time.
+    Displays the main input form for the user to enter their name, gender, country and city of birth, date of birth, and birth time.
 
     Returns:
-        tuple: (name (str), gender (str), country (str), dob (date), hour (int), minute (int), generate_clicked (bool))
+        tuple: (name (str), gender (str), country (str), city (str or None), dob (date), hour (int), minute (int), generate_clicked (bool))
     """
+    import pycountry
+    from gazetteer import city_names
+
     st.markdown('<div id="main-input-form"></div>', unsafe_allow_html=True)
-    with st.form("star_meter_form"):
-        # 1. Add section heading at the very start
-        st.markdown("### Enter Your Birth Details")
+    # 1. Add section heading at the very start
+    st.markdown("### Enter Your Birth Details")
+
+    # Country and city sit outside the form: widgets in a form do not rerun,
+    # and the city suggestions must follow the chosen country
+    country_list = sorted([c.name for c in pycountry.countries])
+    country = st.selectbox(
+        "Country of Birth",
+        country_list,
+        index=country_list.index("Malaysia"),
+        help="This ensures the right solar time and element mapping."
+    )
+    # Shown only with a real city gazetteer (see gazetteer.py); without one
+    # charts use the country's location
+    city = None
+    cities = city_names(country)
+    if cities:
+        city = st.selectbox(
+            "City of Birth (optional)",
+            cities,
+            index=None,
+            placeholder="Start typing to search, or leave blank",
+            accept_new_options=True,
+            help="For wide countries the city's longitude can shift solar time by up to an hour. A city we cannot place falls back to the country."
+        )
 
+    with st.form("star_meter_form"):
         # 2. Add helper text for each field
         name = st.text_input("Name", help="What should we call you? Nicknames are fine.")
         gender = st.selectbox("Gender", ["Male", "Female"], help="Needed for accurate element analysis.")
-        country_list = sorted([c.name for c in pycountry.countries])
-        country = st.selectbox(
-            "Country of Birth",
-            country_list,
-            index=country_list.index("Malaysia"),
-            help="This ensures the right solar time and element mapping."
-        )
         dob = st.date_input(
             "Date of Birth",
             value=dt.date(1990, 1, 1),
@@ -266,7 +289,7 @@ def display_main_input_form():
         st.warning("Please pass the human check before generating your Star Meter.")
 
     # Return all input values and the button state
-    return name, gender, country, dob, hour, minute, generate_clicked and passed_human_check
+    return name, gender, country, city, dob, hour, minute, generate_clicked and passed_human_check
 
 def display_user_summary(name: str, gender: str, country: str, dob, birth_time) -> None:
     """
@@ -425,12 +448,12 @@ def display_identity_expanded_paragraphs(dm_info: dict) -> None:
     )
     st.markdown('</div>', unsafe_allow_html=True)
 
-def display_pillars_table(result: dict) -> None:
+def display_pillars_table(result: BaziResult) -> None:
     """
     Displays the Four Pillars Table, showing Heavenly Stems and Earthly Branches for each pillar, and the Day Master strength verdict.
 
     Args:
-        result (dict): Dictionary containing pillar information and strength verdict.
+        result (BaziResult): BaZi result containing pillar information and strength verdict.
 
     Returns:
         None
@@ -457,13 +480,14 @@ def display_pillars_table(result: dict) -> None:
     </div>
     """, unsafe_allow_html=True)
 
+    hidden_stems = result.hidden_stems
     pillars = [
-        {"label": "Year",  "stem": result['year'][0],  "branch": result['year'][1],  "hidden": result['hidden_stems'][0]},
-        {"label": "Month", "stem": result['month'][0], "branch": result['month'][1], "hidden": result['hidden_stems'][1]},
-        {"label": "Day",   "stem": result['day'][0],   "branch": result['day'][1],   "hidden": result['hidden_stems'][2]},
-        {"label": "Hour",  "stem": result['hour'][0],  "branch": result['hour'][1],  "hidden": result['hidden_stems'][3]},
+        {"label": "Year",  "stem": result.year[0],  "branch": result.year[1],  "hidden": hidden_stems[0]},
+        {"label": "Month", "stem": result.month[0], "branch": result.month[1], "hidden": hidden_stems[1]},
+        {"label": "Day",   "stem": result.day[0],   "branch": result.day[1],   "hidden": hidden_stems[2]},
+        {"label": "Hour",  "stem": result.hour[0],  "branch": result.hour[1],  "hidden": hidden_stems[3]},
     ]
-    verdict = result.get("strength", "")
+    verdict = result.strength
     strength_color = "#fab74b" if verdict == "Strong" else "#44c4fa"
 
     st.markdown("""
@@ -550,12 +574,12 @@ def display_pillars_table(result: dict) -> None:
         hidden_table += "</table>"
         st.markdown(hidden_table, unsafe_allow_html=True)
 
-def display_element_star_meter(result: dict, identity_element: str = None, identity_polarity: str = None) -> None:
+def display_element_star_meter(result: BaziResult, identity_element: str = None, identity_polarity: str = None) -> None:
     """
     Displays the Five Elements Star Meter, showing star ratings and strength labels for each element.
 
     Args:
-        result (dict): Dictionary containing element strengths.
+        result (BaziResult): BaZi result containing element strengths.
         identity_element (str, optional): The user's Day Master element for highlighting.
         identity_polarity (str, optional): The polarity ("Yin" or "Yang") of the Day Master element for displaying its Yin/Yang nature.
 
@@ -565,7 +589,7 @@ def display_element_star_meter(result: dict, identity_element: str = None, ident
     # Center the title
     st.markdown("<h4 style='text-align:center;'>Five Elements Star Meter</h4>", unsafe_allow_html=True)
 
-    element_strengths = result['element_strengths']
+    element_strengths = result.element_strengths
 
     def star_meter(score, color="#ffd700"):
         max_stars = 5
@@ -655,12 +679,12 @@ def display_element_star_meter(result: dict, identity_element: str = None, ident
         # label_strength = get_strength_label(val)  # No longer needed for table row
         table += f"<tr style='background-color:#23262c;'><td>{label}</td><td>{stars}</td></tr>"
     # Add Day Master strength verdict row to the star meter table
-    if identity_element and result.get("strength"):
-        strength_color = "#fab74b" if result["strength"] == "Strong" else "#44c4fa"
+    if identity_element and result.strength:
+        strength_color = "#fab74b" if result.strength == "Strong" else "#44c4fa"
         table += (
             f"<tr>"
             f"<td colspan='2' style='background:#272c32; text-align:center; font-size:1.13em; font-weight:bold; letter-spacing:0.01em; padding:14px 18px; border-bottom-left-radius:13px; border-bottom-right-radius:13px;'>"
-            f"Day Master Strength: <span style='color:{strength_color};'>{result['strength']}</span>"
+            f"Day Master Strength: <span style='color:{strength_color};'>{result.strength}</span>"
             f"</td></tr>"
         )
     table += "</table>"
@@ -673,12 +697,12 @@ def display_element_star_meter(result: dict, identity_element: str = None, ident
         unsafe_allow_html=True
     )
 
-def display_element_score_breakdown(result: dict) -> None:
+def display_element_score_breakdown(result: BaziResult) -> None:
     """
     Displays a detailed scoring breakdown table for the Five Elements, showing visible, hidden, season, and DM bonus points.
 
     Args:
-        result (dict): Dictionary containing the element_score_breakdown data.
+        result (BaziResult): BaZi result; its element score breakdown is built on demand.
 
     Returns:
         None
@@ -689,7 +713,7 @@ def display_element_score_breakdown(result: dict) -> None:
             unsafe_allow_html=True,
         )
 
-        breakdown = result["element_score_breakdown"]
+        breakdown = result.element_score_breakdown
         element_order = ["Wood", "Fire", "Earth", "Metal", "Water"]
 
         st.markdown(
@@ -751,12 +775,12 @@ def display_element_score_breakdown(result: dict) -> None:
         table += "</table>"
         st.markdown(table, unsafe_allow_html=True)
 
-def display_time_info(result: dict, timezone_str: str) -> None:
+def display_time_info(result: BaziResult, timezone_str: str) -> None:
     """
     Displays time-related information, including standard time, solar-corrected time, and timezone.
 
     Args:
-        result (dict): Dictionary containing 'standard_dt' and 'solar_dt' datetime objects.
+        result (BaziResult): BaZi result containing 'standard_dt' and 'solar_dt' datetime objects.
         timezone_str (str): String representation of the timezone.
 
     Returns:
@@ -764,8 +788,8 @@ def display_time_info(result: dict, timezone_str: str) -> None:
     """
     st.markdown(
         f"<div style='text-align:center; color:#78908b; margin-top:-0px; margin-bottom:0px; font-size:1.08em;'>"
-        f"<div><b>Standard Time:</b> {result['standard_dt'].strftime('%Y-%m-%d %H:%M')}</div>"
-        f"<div><b>Solar-corrected:</b> {result['solar_dt'].strftime('%Y-%m-%d %H:%M')}</div>"
+        f"<div><b>Standard Time:</b> {result.standard_dt.strftime('%Y-%m-%d %H:%M')}</div>"
+        f"<div><b>Solar-corrected:</b> {result.solar_dt.strftime('%Y-%m-%d %H:%M')}</div>"
         f"<div><b>Timezone:</b> {timezone_str}</div>"
         f"</div>",
         unsafe_allow_html=True
@@ -918,7 +942,7 @@ def display_pdf_request_form(state_dict: dict) -> None:
                     "SIMPLE"
                 ]
                 try:
-                    result = append_to_gsheet(row)
+                    result = save_lead(row)
                     if result in (None, False, "duplicate"):
                         state_dict["email_submitted"] = True
                         message = "duplicate"
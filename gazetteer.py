@@ -0,0 +1,297 @@
+import csv
+import gzip
+import io
+import os
+import sys
+import tempfile
+import unicodedata
+import zipfile
+from functools import lru_cache
+from typing import NamedTuple
+import numpy as np
+
+# Birthplace search over a bundled city gazetteer.
+#
+# data/cities.tsv.gz is the source: one city per row with its name, ASCII
+# name, ISO country code, latitude, longitude, IANA timezone and population.
+# build_gazetteer_source converts a GeoNames dump (cities15000.txt/.zip from
+# download.geonames.org/export/dump) into it:
+#
+#   python gazetteer.py cities15000.zip
+#
+# The source is not bundled yet. Without it the gazetteer is empty: the app
+# hides the city box, and a submitted city falls back to its country.
+#
+# The search index is derived from the source on first use and saved as .npy
+# files that are memory-mapped read-only, so every Streamlit worker shares
+# the same pages:
+#   keys.npy     — sorted, fixed-width normalized names (both the name and
+#                  its ASCII form), so a prefix is a range found by bisection;
+#   key_city.npy — the city row of each key;
+#   cities.npy   — one structured record per city.
+
+GAZETTEER_SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.tsv.gz")
+GAZETTEER_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer")
+KEY_BYTES = 48
+SOURCE_COLUMNS = ["name", "ascii_name", "country_code", "latitude", "longitude", "timezone", "population"]
+CITY_DTYPE = np.dtype([
+    ("name", "U48"), ("country_code", "U2"), ("latitude", "f8"), ("longitude", "f8"),
+    ("timezone", "U40"), ("population", "i8"),
+])
+_INDEX_FILES = ("cities.npy", "key_city.npy", "keys.npy")   # keys.npy is written last
+
+class City(NamedTuple):
+    """A gazetteer entry."""
+    name: str
+    country_code: str
+    latitude: float
+    longitude: float
+    timezone: str
+    population: int
+
+# ————————————————————————————————————————————————————
+# Normalization
+# ————————————————————————————————————————————————————
+def normalize_name(text: str) -> str:
+    """Fold a place name for matching: strip accents, casefold, collapse punctuation.
+
+    Args:
+        text: Place name or partial name.
+
+    Returns:
+        Normalized name ("São Paulo" -> "sao paulo").
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = "".join(ch if ch.isalnum() else " " for ch in stripped.casefold())
+    return " ".join(cleaned.split())
+
+def _key(text: str) -> bytes:
+    """Return the fixed-width index key of a name."""
+    return normalize_name(text).encode("utf-8")[:KEY_BYTES]
+
+@lru_cache(maxsize=512)
+def country_code(country: str) -> str | None:
+    """Return the ISO alpha-2 code of a pycountry country name, or None."""
+    import pycountry
+    match = pycountry.countries.get(name=country)
+    return match.alpha_2 if match else None
+
+def _code(country: str) -> str | None:
+    """ISO alpha-2 code of a country given by name or code."""
+    return country if len(country) == 2 else country_code(country)
+
+# ————————————————————————————————————————————————————
+# Build
+# ————————————————————————————————————————————————————
+def _read_source(path: str) -> list[dict[str, str]]:
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f, delimiter="\t"))
+
+def _write_source(rows: list[list[object]], path: str) -> str:
+    """Write source rows atomically as gzip TSV."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tsv.gz")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+            with io.TextIOWrapper(gz, encoding="utf-8", newline="") as f:
+                writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+                writer.writerow(SOURCE_COLUMNS)
+                writer.writerows(rows)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+def build_gazetteer_source(geonames_path: str, path: str = GAZETTEER_SOURCE_PATH, min_population: int = 0) -> str:
+    """Create the city source file from a GeoNames dump.
+
+    Args:
+        geonames_path: GeoNames cities dump (tab-separated .txt, or a .zip
+            containing one).
+        path: Output path.
+        min_population: Skip cities smaller than this.
+
+    Returns:
+        The path written.
+    """
+    if geonames_path.endswith(".zip"):
+        with zipfile.ZipFile(geonames_path) as zf:
+            text = zf.read(zf.namelist()[0]).decode("utf-8")
+    else:
+        with open(geonames_path, encoding="utf-8") as f:
+            text = f.read()
+    rows = []
+    for line in text.splitlines():
+        # GeoNames columns: 1 name, 2 asciiname, 4 lat, 5 lon, 8 country, 14 population, 17 timezone
+        cols = line.split("\t")
+        if len(cols) < 18 or not cols[17]:
+            continue
+        population = int(cols[14] or 0)
+        if population < min_population:
+            continue
+        rows.append([cols[1], cols[2], cols[8], cols[4], cols[5], cols[17], population])
+    rows.sort(key=lambda r: (r[2], r[0]))
+    return _write_source(rows, path)
+
+def build_gazetteer_index(source: str = GAZETTEER_SOURCE_PATH, index_dir: str = GAZETTEER_INDEX_DIR) -> str:
+    """Build the memory-mappable prefix index from the source file.
+
+    Each file is written to a temporary name and renamed into place, keys.npy
+    last, so a reader that finds keys.npy finds a complete index.
+
+    Args:
+        source: City source (gzip TSV).
+        index_dir: Output directory.
+
+    Returns:
+        The index directory.
+    """
+    arrays = _index_arrays(source)
+    os.makedirs(index_dir, exist_ok=True)
+    for name, array in zip(_INDEX_FILES, arrays):
+        fd, tmp_path = tempfile.mkstemp(dir=index_dir, suffix=".npy")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, array)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, os.path.join(index_dir, name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    load_gazetteer.cache_clear()
+    city_names.cache_clear()
+    return index_dir
+
+def read_source_rows(source: str = GAZETTEER_SOURCE_PATH) -> list[dict[str, str]]:
+    """Return the rows of the city source, or [] if it has not been built."""
+    return _read_source(source) if os.path.exists(source) else []
+
+def _index_arrays(source: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Build the index arrays (cities, key_city, keys) from the source file."""
+    rows = read_source_rows(source)
+    cities = np.zeros(len(rows), dtype=CITY_DTYPE)
+    keys, key_city = [], []
+    for i, row in enumerate(rows):
+        cities[i] = (row["name"], row["country_code"], float(row["latitude"]), float(row["longitude"]),
+                     row["timezone"], int(row["population"] or 0))
+        for key in {_key(row["name"]), _key(row["ascii_name"])}:
+            if key:
+                keys.append(key)
+                key_city.append(i)
+    keys = np.array(keys, dtype=f"S{KEY_BYTES}")
+    key_city = np.array(key_city, dtype=np.int32)
+    order = np.argsort(keys, kind="stable")
+    return cities, key_city[order], keys[order]
+
+# ————————————————————————————————————————————————————
+# Search
+# ————————————————————————————————————————————————————
+@lru_cache(maxsize=4)
+def load_gazetteer(index_dir: str = GAZETTEER_INDEX_DIR, source: str = GAZETTEER_SOURCE_PATH) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Memory-map the prefix index, (re)building it if missing or older than the source.
+
+    If the index cannot be written (e.g. a read-only deploy directory), it is
+    built in memory for this process instead. Without a source the index is
+    empty.
+
+    Returns:
+        Tuple of (keys, key_city, cities) read-only arrays.
+    """
+    keys_path = os.path.join(index_dir, "keys.npy")
+    try:
+        if not os.path.exists(source):
+            raise FileNotFoundError(source)
+        if not os.path.exists(keys_path) or os.path.getmtime(keys_path) < os.path.getmtime(source):
+            build_gazetteer_index(source, index_dir)
+    except OSError:
+        cities, key_city, keys = _index_arrays(source)
+        for array in (cities, key_city, keys):
+            array.flags.writeable = False
+        return keys, key_city, cities
+    return tuple(np.load(os.path.join(index_dir, name), mmap_mode="r") for name in ("keys.npy", "key_city.npy", "cities.npy"))
+
+def _city(record: np.void) -> City:
+    return City(str(record["name"]), str(record["country_code"]), float(record["latitude"]),
+                float(record["longitude"]), str(record["timezone"]), int(record["population"]))
+
+def search_cities(prefix: str, country: str | None = None, limit: int = 10) -> list[City]:
+    """Return cities whose name starts with a prefix, for type-ahead.
+
+    Exact name matches come first, then larger cities.
+
+    Args:
+        prefix: Partial city name (accents and case are ignored).
+        country: Optional pycountry country name or ISO alpha-2 code to restrict to.
+        limit: Maximum number of results.
+
+    Returns:
+        List of City.
+    """
+    key = _key(prefix)
+    if not key:
+        return []
+    keys, key_city, cities = load_gazetteer()
+    lo = int(np.searchsorted(keys, key, side="left"))
+    hi = int(np.searchsorted(keys, key + b"\xff", side="left"))
+    if lo == hi:
+        return []
+
+    rows, first = np.unique(key_city[lo:hi], return_index=True)
+    exact = keys[lo:hi][first] == key
+    if country:
+        keep = cities["country_code"][rows] == _code(country)
+        rows, exact = rows[keep], exact[keep]
+    population = cities["population"][rows]
+    order = np.lexsort((-population, ~exact))[:limit]
+    return [_city(cities[r]) for r in rows[order]]
+
+def resolve_city(name: str, country: str | None = None) -> City | None:
+    """Return the city a submitted name refers to, or None.
+
+    Only exact matches count (accents, case and punctuation aside): a
+    partial or misspelt name must not silently become another city.
+    Prefix matches are for suggestions (search_cities, city_names).
+
+    Args:
+        name: City name as entered.
+        country: Optional pycountry country name or ISO alpha-2 code.
+
+    Returns:
+        The largest city of that name, or None.
+    """
+    key = _key(name)
+    if not key:
+        return None
+    keys, key_city, cities = load_gazetteer()
+    lo = int(np.searchsorted(keys, key, side="left"))
+    hi = int(np.searchsorted(keys, key, side="right"))
+    rows = np.unique(key_city[lo:hi])
+    if country:
+        rows = rows[cities["country_code"][rows] == _code(country)]
+    if not len(rows):
+        return None
+    return _city(cities[rows[np.argmax(cities["population"][rows])]])
+
+@lru_cache(maxsize=256)
+def city_names(country: str) -> tuple[str, ...]:
+    """Return the distinct city names of a country for a searchable select box.
+
+    Args:
+        country: pycountry country name or ISO alpha-2 code.
+
+    Returns:
+        Names, larger cities first, then alphabetical.
+    """
+    _, _, cities = load_gazetteer()
+    rows = np.flatnonzero(cities["country_code"] == _code(country))
+    order = np.lexsort((cities["name"][rows], -cities["population"][rows]))
+    return tuple(dict.fromkeys(str(name) for name in cities["name"][rows[order]]))
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python gazetteer.py <GeoNames cities15000.zip or .txt>")
+    print(f"Wrote {build_gazetteer_source(sys.argv[1])}")
+    print(f"Wrote {build_gazetteer_index()}")
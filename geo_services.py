@@ -0,0 +1,171 @@
+from __future__ import annotations
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from geopy.geocoders import Nominatim
+    from timezonefinder import TimezoneFinder
+
+# Process-wide geocoder and timezone finder.
+#
+# Building a TimezoneFinder reloads its polygon data, so one instance is
+# created per process (double-checked locking) and shared by every Streamlit
+# script thread. Lookups take no lock: from timezonefinder 9 (pinned in
+# requirements.txt) an instance is safe for concurrent reads — nothing on
+# the lookup path mutates it, and polygon data is read through a memory map
+# rather than a shared file position as in older releases — and geopy's
+# Nominatim only holds immutable settings plus a thread-safe HTTP session. geopy and timezonefinder are imported on first
+# use (or by the warm-up thread), not when this module is imported.
+
+GEOCODER_USER_AGENT = "my_bazi_app"
+GEOCODER_TIMEOUT_S = 5
+
+_init_lock = threading.Lock()
+_timezone_finder: TimezoneFinder | None = None
+_geocoder: Nominatim | None = None
+_warm_up_thread: threading.Thread | None = None
+
+# Construction and lookup timings; the lock only guards counter updates
+_metrics_lock = threading.Lock()
+_metrics = {
+    "timezone_finder": {"constructed": 0, "construct_s": 0.0, "in_memory": None, "lookups": 0, "lookup_s": 0.0},
+    "geocoder": {"constructed": 0, "construct_s": 0.0, "lookups": 0, "lookup_s": 0.0, "errors": 0},
+}
+
+def _record(service: str, **deltas: float) -> None:
+    with _metrics_lock:
+        for key, value in deltas.items():
+            _metrics[service][key] += value
+
+# ————————————————————————————————————————————————————
+# Shared Instances
+# ————————————————————————————————————————————————————
+def get_timezone_finder(in_memory: bool = False) -> TimezoneFinder:
+    """Return the process-wide TimezoneFinder, creating it on first use.
+
+    Args:
+        in_memory: Load polygon data into memory instead of reading it from
+            file (faster lookups, more RAM). Only honoured by the call that
+            creates the instance.
+
+    Returns:
+        Shared TimezoneFinder.
+    """
+    global _timezone_finder
+    if _timezone_finder is None:
+        with _init_lock:
+            if _timezone_finder is None:
+                from timezonefinder import TimezoneFinder
+                started = time.perf_counter()
+                finder = TimezoneFinder(in_memory=in_memory)
+                _record("timezone_finder", constructed=1, construct_s=time.perf_counter() - started)
+                _metrics["timezone_finder"]["in_memory"] = in_memory
+                _timezone_finder = finder
+    return _timezone_finder
+
+def get_geocoder() -> Nominatim:
+    """Return the process-wide Nominatim geocoder, creating it on first use."""
+    global _geocoder
+    if _geocoder is None:
+        with _init_lock:
+            if _geocoder is None:
+                from geopy.geocoders import Nominatim
+                started = time.perf_counter()
+                geocoder = Nominatim(user_agent=GEOCODER_USER_AGENT, timeout=GEOCODER_TIMEOUT_S)
+                _record("geocoder", constructed=1, construct_s=time.perf_counter() - started)
+                _geocoder = geocoder
+    return _geocoder
+
+# ————————————————————————————————————————————————————
+# Lookups
+# ————————————————————————————————————————————————————
+def timezone_at(lng: float, lat: float) -> str | None:
+    """Return the IANA timezone at a coordinate using the shared finder.
+
+    Args:
+        lng: Longitude in degrees.
+        lat: Latitude in degrees.
+
+    Returns:
+        Timezone name, or None if no zone matches.
+    """
+    finder = get_timezone_finder()
+    started = time.perf_counter()
+    tz_str = finder.timezone_at(lng=lng, lat=lat)
+    _record("timezone_finder", lookups=1, lookup_s=time.perf_counter() - started)
+    return tz_str
+
+def geocode(query: str) -> object | None:
+    """Geocode a place name using the shared Nominatim geocoder.
+
+    Args:
+        query: Place name.
+
+    Returns:
+        geopy Location, or None if nothing matched.
+    """
+    geocoder = get_geocoder()
+    started = time.perf_counter()
+    try:
+        return geocoder.geocode(query)
+    except Exception:
+        _record("geocoder", errors=1)
+        raise
+    finally:
+        _record("geocoder", lookups=1, lookup_s=time.perf_counter() - started)
+
+# ————————————————————————————————————————————————————
+# Warm-up and Metrics
+# ————————————————————————————————————————————————————
+def warm_up(in_memory: bool = False) -> dict[str, dict[str, float]]:
+    """Create the shared instances now instead of on the first request.
+
+    Also loads the chart score table and the precompiled timezone
+    transitions (building either if it is missing), so the first chart does
+    not pay for them.
+
+    Args:
+        in_memory: Load TimezoneFinder polygon data into memory.
+
+    Returns:
+        Metrics snapshot after warm-up (see geo_metrics).
+    """
+    get_timezone_finder(in_memory)
+    get_geocoder()
+    from chart_table import load_chart_table
+    from tz_offsets import warm_up_zones
+    load_chart_table()
+    warm_up_zones()
+    return geo_metrics()
+
+def start_warm_up(in_memory: bool = False) -> threading.Thread:
+    """Run warm_up once per process in a background thread.
+
+    Safe to call on every script rerun: later calls return the first thread.
+
+    Args:
+        in_memory: Load TimezoneFinder polygon data into memory.
+
+    Returns:
+        The warm-up thread.
+    """
+    global _warm_up_thread
+    with _metrics_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, args=(in_memory,), name="geo-warm-up", daemon=True)
+            _warm_up_thread.start()
+        return _warm_up_thread
+
+def geo_metrics() -> dict[str, dict[str, float]]:
+    """Return construction and lookup timings per service.
+
+    Returns:
+        Mapping of service name to counters, including mean lookup time
+        ("lookup_mean_s") next to the one-off construction cost.
+    """
+    with _metrics_lock:
+        snapshot = {name: dict(values) for name, values in _metrics.items()}
+    for values in snapshot.values():
+        values["lookup_mean_s"] = values["lookup_s"] / values["lookups"] if values["lookups"] else 0.0
+    return snapshot
@@ -0,0 +1,247 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, NamedTuple
+
+# Persistent cache in front of the network geocoder.
+#
+# Results (including "not found") are stored in SQLite so they survive
+# restarts and are shared by every process on the host. Entries expire after
+# a TTL, and the least recently used ones are evicted once the table grows
+# past max_entries. Concurrent misses for the same query are coalesced: the
+# first caller fetches, the others wait for its result (single-flight), so
+# a burst of identical lookups costs one network round trip. Fetch errors
+# are never cached; every waiting caller sees the exception.
+#
+# A circuit breaker keeps a geocoder outage from costing every request a
+# timeout: after a fetch error, misses fail at once with
+# GeocoderUnavailable for BREAKER_OPEN_S (doubling per consecutive
+# failure up to BREAKER_MAX_OPEN_S). Once that passes, a single caller
+# probes the geocoder while the others keep failing fast; a success closes
+# the breaker. Hits are served throughout.
+
+GEOCODE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "geocode_cache.sqlite")
+DEFAULT_TTL_S = 30 * 24 * 3600
+NOT_FOUND_TTL_S = 24 * 3600
+DEFAULT_MAX_ENTRIES = 10_000
+BREAKER_OPEN_S = 30.0
+BREAKER_MAX_OPEN_S = 600.0
+
+class GeocoderUnavailable(RuntimeError):
+    """Raised instead of fetching while the circuit breaker is open."""
+
+class GeocodedPlace(NamedTuple):
+    """A resolved place: coordinates plus IANA timezone."""
+    latitude: float
+    longitude: float
+    timezone: str
+
+class _Flight:
+    """One in-flight fetch that concurrent callers wait on."""
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: GeocodedPlace | None = None
+        self.error: BaseException | None = None
+
+class GeocodeCache:
+    """SQLite-backed TTL/LRU cache with single-flight fetches."""
+
+    def __init__(self, path: str = GEOCODE_CACHE_PATH, ttl_s: float = DEFAULT_TTL_S,
+                 not_found_ttl_s: float = NOT_FOUND_TTL_S, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """Open (creating if needed) the cache database.
+
+        Args:
+            path: SQLite file.
+            ttl_s: Lifetime of found entries in seconds.
+            not_found_ttl_s: Lifetime of "not found" entries in seconds.
+            max_entries: Entries kept before least recently used ones are evicted.
+        """
+        self.path = path
+        self.ttl_s = ttl_s
+        self.not_found_ttl_s = not_found_ttl_s
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._flights: dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "fetches": 0, "errors": 0, "evictions": 0,
+                      "short_circuited": 0}
+        self._breaker_lock = threading.Lock()
+        self._failures = 0              # consecutive fetch errors
+        self._open_until = 0.0          # monotonic time the breaker stays open until
+        self._probing = False           # a caller is testing the geocoder after an outage
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                " query TEXT PRIMARY KEY, latitude REAL, longitude REAL, timezone TEXT,"
+                " expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS geocode_accessed ON geocode (accessed)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 connections are per thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[stat] += n
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return " ".join(query.casefold().split())
+
+    def _enter_breaker(self) -> None:
+        """Allow a fetch, or raise GeocoderUnavailable while the breaker is open or being probed."""
+        with self._breaker_lock:
+            if self._failures and (self._probing or time.monotonic() < self._open_until):
+                self._count("short_circuited")
+                raise GeocoderUnavailable("Geocoder unavailable after recent errors; retrying later")
+            if self._failures:
+                self._probing = True
+
+    def _leave_breaker(self, ok: bool) -> None:
+        with self._breaker_lock:
+            self._probing = False
+            if ok:
+                self._failures = 0
+            else:
+                self._failures += 1
+                open_s = min(BREAKER_MAX_OPEN_S, BREAKER_OPEN_S * 2 ** (self._failures - 1))
+                self._open_until = time.monotonic() + open_s
+
+    def get(self, query: str) -> tuple[bool, GeocodedPlace | None]:
+        """Look a query up without fetching.
+
+        Returns:
+            Tuple of (cached, place); place is None for a cached "not found".
+        """
+        key = self._key(query)
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT latitude, longitude, timezone FROM geocode WHERE query = ? AND expires > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return False, None
+        with conn:
+            conn.execute("UPDATE geocode SET accessed = ? WHERE query = ?", (now, key))
+        return True, (GeocodedPlace(*row) if row[2] is not None else None)
+
+    def put(self, query: str, place: GeocodedPlace | None) -> None:
+        """Store a result (None records "not found") and evict beyond max_entries."""
+        now = time.time()
+        ttl = self.ttl_s if place is not None else self.not_found_ttl_s
+        values = place if place is not None else (None, None, None)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(query), *values, now + ttl, now),
+            )
+            conn.execute("DELETE FROM geocode WHERE expires <= ?", (now,))
+            evicted = conn.execute(
+                "DELETE FROM geocode WHERE query IN ("
+                " SELECT query FROM geocode ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        if evicted:
+            self._count("evictions", evicted)
+
+    def get_or_fetch(self, query: str, fetch: Callable[[str], GeocodedPlace | None]) -> GeocodedPlace | None:
+        """Return the cached result for query, fetching it at most once concurrently.
+
+        Args:
+            query: Place name.
+            fetch: Called with the query on a miss; returns a GeocodedPlace or None.
+
+        Returns:
+            GeocodedPlace, or None if the place was not found.
+
+        Raises:
+            GeocoderUnavailable: On a miss while the circuit breaker is open.
+            Exception: Whatever fetch raised (not cached).
+        """
+        cached, place = self.get(query)
+        if cached:
+            self._count("hits")
+            return place
+
+        key = self._key(query)
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._count("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        self._count("misses")
+        try:
+            # Another process may have filled it while we waited for the lock
+            cached, place = self.get(query)
+            if not cached:
+                self._enter_breaker()
+                self._count("fetches")
+                fetched = False
+                try:
+                    place = fetch(query)
+                    fetched = True
+                finally:
+                    self._leave_breaker(fetched)
+                self.put(query, place)
+            flight.result = place
+            return place
+        except BaseException as err:
+            self._count("errors")
+            flight.error = err
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+
+_default_cache: GeocodeCache | None = None
+_default_cache_lock = threading.Lock()
+
+def get_geocode_cache() -> GeocodeCache:
+    """Return the process-wide cache at GEOCODE_CACHE_PATH."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = GeocodeCache()
+    return _default_cache
+
+def _fetch_place(query: str) -> GeocodedPlace | None:
+    """Geocode a place and find its timezone over the network."""
+    from geo_services import geocode, timezone_at
+    location = geocode(query)
+    if not location:
+        return None
+    tz_str = timezone_at(lng=location.longitude, lat=location.latitude)
+    if not tz_str:
+        return None
+    return GeocodedPlace(location.latitude, location.longitude, tz_str)
+
+def cached_geocode(query: str) -> GeocodedPlace | None:
+    """Resolve a place name to coordinates and timezone through the persistent cache.
+
+    Args:
+        query: Place name.
+
+    Returns:
+        GeocodedPlace, or None if the geocoder found nothing (or no timezone).
+    """
+    return get_geocode_cache().get_or_fetch(query, _fetch_place)
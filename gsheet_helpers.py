@@ -1,19 +1,62 @@
-import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import os
+import threading
+import time
 import json
 import re
 import hashlib
 import datetime as dt
-import pytz
+from rate_limit import TokenBucket
+from sheet_writer import get_writer
 
 SHEET_NAME = "MyElement Leads"
 PROSPECTS_SHEET_NAME = "prospects"  # Main worksheet/tab name for prospect leads
 SURVEY_SHEET_NAME = "survey"  # Name of the new worksheet/tab in your Google Sheet
 EMAIL_PATTERN = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+$")
 
-def get_worksheet(tab_name: str):
-    """Return a worksheet instance for the given tab_name."""
+# Authorized client, spreadsheet and worksheet handles are cached per process,
+# so a write costs only its own API call. The client's AuthorizedSession
+# refreshes the OAuth token by itself; handles are rebuilt when a request is
+# rejected as unauthorized/not found or a worksheet lookup fails.
+_handles_lock = threading.Lock()
+_spreadsheet = None
+_worksheets = {}
+_STALE_HANDLE_STATUS = {401, 403, 404}
+
+# Every API request takes a token from one bucket sized to the Sheets quota
+# (60 requests per minute per user). Refill plus burst never exceeds the
+# quota within a minute. Leads are served before survey ratings. Setting
+# MYELEMENT_SHEETS_QUOTA_FILE shares the bucket between processes on the host.
+SHEETS_REQUESTS_PER_MINUTE = 60
+SHEETS_BURST = 5
+SHEETS_QUOTA_WAIT_S = 60
+RATE_LIMITED_PAUSE_S = 10
+QUOTA_FILE_ENV = "MYELEMENT_SHEETS_QUOTA_FILE"
+PRIORITY_LEAD = 0
+PRIORITY_SURVEY = 1
+# Requests made when handles are (re)built: opening the spreadsheet by name
+# searches Drive and then fetches the spreadsheet metadata; looking up a
+# worksheet fetches the metadata again. Authorizing makes no request until
+# the first call, whose token refresh does not count against the quota.
+OPEN_SPREADSHEET_REQUESTS = 2
+WORKSHEET_LOOKUP_REQUESTS = 1
+_bucket = None
+_bucket_lock = threading.Lock()
+
+# Keys (column A) of every prospect row, so duplicate checks need no API
+# call. Loaded with one column read, updated as rows are queued and
+# reconciled with the sheet every KEY_INDEX_REFRESH_S (picking up rows
+# added or removed by hand). Rows still queued for writing are kept.
+KEY_INDEX_REFRESH_S = 600
+KEY_INDEX_RETRY_S = 60
+_keys_lock = threading.Lock()
+_known_keys = None
+_keys_loaded_at = 0.0
+
+def _open_spreadsheet():
+    """Authorize with the service account and open the spreadsheet."""
+    import gspread
+    import streamlit as st
+    from oauth2client.service_account import ServiceAccountCredentials
     scope = [
         "https://spreadsheets.google.com/feeds",
         "https://www.googleapis.com/auth/drive"
@@ -21,8 +64,165 @@ def get_worksheet(tab_name: str):
     creds_dict = json.loads(st.secrets["google_service_account"])
     creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
     client = gspread.authorize(creds)
-    sheet = client.open(SHEET_NAME)
-    return sheet.worksheet(tab_name)
+    return client.open(SHEET_NAME)
+
+def get_quota_bucket() -> TokenBucket:
+    """Return the token bucket all Sheets requests go through."""
+    global _bucket
+    if _bucket is None:
+        with _bucket_lock:
+            if _bucket is None:
+                _bucket = TokenBucket((SHEETS_REQUESTS_PER_MINUTE - SHEETS_BURST) / 60, SHEETS_BURST,
+                                      os.environ.get(QUOTA_FILE_ENV))
+    return _bucket
+
+def sheets_queue_depth() -> dict[int, int]:
+    """Number of requests waiting for Sheets quota, per priority (PRIORITY_LEAD, PRIORITY_SURVEY)."""
+    return get_quota_bucket().queue_depth()
+
+def _tab_priority(tab_name: str) -> int:
+    return PRIORITY_LEAD if tab_name == PROSPECTS_SHEET_NAME else PRIORITY_SURVEY
+
+def _acquire_quota(priority: int, requests: int = 1) -> None:
+    """Wait for one Sheets request token per request about to be made.
+
+    Raises:
+        TimeoutError: If the tokens were not granted within SHEETS_QUOTA_WAIT_S.
+    """
+    bucket = get_quota_bucket()
+    for _ in range(requests):
+        if not bucket.acquire(priority, SHEETS_QUOTA_WAIT_S):
+            raise TimeoutError("Timed out waiting for Google Sheets quota")
+
+def get_worksheet(tab_name: str):
+    """Return a worksheet instance for the given tab_name (cached per process)."""
+    global _spreadsheet
+    worksheet = _worksheets.get(tab_name)
+    if worksheet is not None:
+        return worksheet
+    with _handles_lock:
+        worksheet = _worksheets.get(tab_name)
+        if worksheet is None:
+            try:
+                priority = _tab_priority(tab_name)
+                if _spreadsheet is None:
+                    _acquire_quota(priority, OPEN_SPREADSHEET_REQUESTS)
+                    _spreadsheet = _open_spreadsheet()
+                _acquire_quota(priority, WORKSHEET_LOOKUP_REQUESTS)
+                worksheet = _spreadsheet.worksheet(tab_name)
+            except Exception:
+                _spreadsheet = None
+                _worksheets.clear()
+                raise
+            _worksheets[tab_name] = worksheet
+    return worksheet
+
+def invalidate_worksheets() -> None:
+    """Drop the cached client and worksheet handles; the next call re-authorizes."""
+    global _spreadsheet
+    with _handles_lock:
+        _spreadsheet = None
+        _worksheets.clear()
+
+def _is_stale_handle_error(err: Exception) -> bool:
+    """Return True if an error means the cached handles should be rebuilt."""
+    import gspread
+    if isinstance(err, (gspread.exceptions.WorksheetNotFound, gspread.exceptions.SpreadsheetNotFound)):
+        return True
+    if isinstance(err, gspread.exceptions.APIError):
+        return getattr(err.response, "status_code", None) in _STALE_HANDLE_STATUS
+    return False
+
+def _pause_if_rate_limited(err: Exception) -> None:
+    """Stop granting Sheets quota for a while when the server answers 429."""
+    import gspread
+    if isinstance(err, gspread.exceptions.APIError) and getattr(err.response, "status_code", None) == 429:
+        retry_after = getattr(err.response, "headers", {}).get("Retry-After", "")
+        get_quota_bucket().penalize(float(retry_after) if retry_after.isdigit() else RATE_LIMITED_PAUSE_S)
+
+def with_worksheet(tab_name: str, operation, priority: int | None = None):
+    """Run operation(worksheet) within the Sheets quota, rebuilding stale handles and retrying once.
+
+    Args:
+        tab_name: Worksheet/tab name.
+        operation: Callable taking the worksheet (one API request).
+        priority: PRIORITY_LEAD or PRIORITY_SURVEY; defaults by tab.
+
+    Returns:
+        Whatever operation returns.
+
+    Raises:
+        TimeoutError: If quota was not granted within SHEETS_QUOTA_WAIT_S.
+    """
+    priority = _tab_priority(tab_name) if priority is None else priority
+    for attempt in range(2):
+        worksheet = get_worksheet(tab_name)
+        _acquire_quota(priority)
+        try:
+            return operation(worksheet)
+        except Exception as err:
+            _pause_if_rate_limited(err)
+            if attempt or not _is_stale_handle_error(err):
+                raise
+            invalidate_worksheets()
+
+def _append_rows(tab_name: str, rows: list[list]) -> None:
+    """Write one batch of rows to a worksheet with a single API call."""
+    with_worksheet(tab_name, lambda ws: ws.append_rows(rows))
+
+def flush_pending_rows(timeout_s: float = 10.0) -> bool:
+    """Write all queued rows now (they are also flushed automatically and at exit).
+
+    Returns:
+        True if nothing is left queued.
+    """
+    return get_writer(_append_rows).flush(timeout_s)
+
+def _reconcile_keys() -> None:
+    """Reload the prospect key index from the sheet. Caller holds _keys_lock."""
+    global _known_keys, _keys_loaded_at
+    # Snapshot the queue first: a row written after this is in the column read
+    queued = {row[0] for row in get_writer(_append_rows).pending(PROSPECTS_SHEET_NAME)}
+    sheet_keys = with_worksheet(PROSPECTS_SHEET_NAME, lambda ws: ws.col_values(1))
+    _known_keys = set(sheet_keys) | queued
+    _keys_loaded_at = time.monotonic()
+
+def _current_keys() -> set:
+    """Return the key index, loading or reconciling it as due. Caller holds _keys_lock."""
+    global _keys_loaded_at
+    if _known_keys is None:
+        _reconcile_keys()
+    elif time.monotonic() - _keys_loaded_at >= KEY_INDEX_REFRESH_S:
+        try:
+            _reconcile_keys()
+        except Exception:
+            # Keep the current index; try again after KEY_INDEX_RETRY_S
+            _keys_loaded_at = time.monotonic() - KEY_INDEX_REFRESH_S + KEY_INDEX_RETRY_S
+    return _known_keys
+
+def is_known_lead(key: str) -> bool:
+    """Return True if a prospect row with this key is in the sheet or queued (no API call once loaded)."""
+    with _keys_lock:
+        return key in _current_keys()
+
+def peek_known_lead(key: str) -> bool | None:
+    """Check the key index only if it is loaded and free (never loads it or waits).
+
+    Returns:
+        True/False, or None if the index is not loaded yet or is busy reloading.
+    """
+    if not _keys_lock.acquire(blocking=False):
+        return None
+    try:
+        return None if _known_keys is None else key in _known_keys
+    finally:
+        _keys_lock.release()
+
+def refresh_key_index() -> None:
+    """Force the prospect key index to be reloaded on the next lead."""
+    global _keys_loaded_at
+    with _keys_lock:
+        _keys_loaded_at = 0.0
 
 def is_valid_email(email: str) -> bool:
     """Check if the provided email string is a valid email address.
@@ -35,24 +235,49 @@ def is_valid_email(email: str) -> bool:
     """
     return EMAIL_PATTERN.match(email) is not None
 
+def queue_lead(data: list) -> str:
+    """Queue a prospect row unless its key (data[0]) is already known.
+
+    Duplicates are checked against the in-process key index (no API call);
+    the row is written in the background with other queued rows.
+
+    Args:
+        data: A list of values representing a row to append.
+
+    Returns:
+        'added' if the row was queued, 'duplicate' if the key already exists.
+
+    Raises:
+        Exception: If the key index could not be loaded from the sheet.
+    """
+    with _keys_lock:
+        keys = _current_keys()
+        if data[0] in keys:
+            return 'duplicate'
+        keys.add(data[0])
+        get_writer(_append_rows).enqueue(PROSPECTS_SHEET_NAME, data)
+    return 'added'
+
+def queue_survey_row(row: list) -> None:
+    """Queue a row for the survey worksheet."""
+    get_writer(_append_rows).enqueue(SURVEY_SHEET_NAME, row)
+
 def append_to_gsheet(data: list) -> str:
-    """Append a row of data to the Google Sheet if the key is not a duplicate.
+    """Queue a row of data for the Google Sheet if the key is not a duplicate.
+
+    Duplicates are checked against the in-process key index (no API call);
+    the row is written in the background with other queued rows.
     
     Args:
         data: A list of values representing a row to append.
         
     Returns:
-        'added' if the row was added,
+        'added' if the row was queued,
         'duplicate' if the key already exists,
         'error: <message>' if an error occurred.
     """
     try:
-        sheet = get_worksheet(PROSPECTS_SHEET_NAME)
-        key = data[0]
-        if sheet.findall(key):
-            return 'duplicate'
-        sheet.append_row(data)
-        return 'added'
+        return queue_lead(data)
     except Exception as e:
         return f'error: {str(e)}'
 
@@ -78,13 +303,13 @@ def append_survey_response(rating: int, user_id: str = "anon", name: str = "") -
         user_id: Optional identifier (email or anon/session).
         name: User's name from input (optional).
     Returns:
-        'added' or error string.
+        'added' once the response is queued, or error string.
     """
     try:
-        ws = get_worksheet(SURVEY_SHEET_NAME)
+        import pytz
         malaysia_tz = pytz.timezone('Asia/Kuala_Lumpur')
         timestamp = dt.datetime.now(malaysia_tz).isoformat()
-        ws.append_row([timestamp, rating, user_id, name])
+        queue_survey_row([timestamp, rating, user_id, name])
         return "added"
     except Exception as e:
         return f"error: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,214 @@
+import datetime as dt
+from bisect import bisect_right
+from functools import lru_cache
+from typing import NamedTuple
+from bazi_calculator import BaziResult, pillar_index
+from bazi_constants import JIA_ZI
+from ephemeris import resolve_mode
+from solar_terms import (
+    FIRST_SOLAR_YEAR, LAST_SOLAR_YEAR, TERMS_PER_YEAR, boundary_utc, julian_day, solar_term_table
+)
+
+# Luck pillars (大运) step through the sexagenary cycle from the natal month
+# pillar, one pillar per ten years: forwards for a yang year stem and male,
+# or yin year stem and female; backwards otherwise. The first one starts
+# after as many years as there are days, divided by three, between birth
+# and the next (forwards) or previous (backwards) 节 term.
+#
+# Annual (流年) and monthly (流月) pillars are those of each solar year and
+# BaZi month, starting at 立春 and at each 节 respectively.
+
+LUCK_PILLAR_YEARS = 10
+DAYS_PER_LUCK_YEAR = 3
+_DAYS_PER_YEAR = 365.2422
+_MONTHS_PER_YEAR = TERMS_PER_YEAR // 2
+
+class LuckPillar(NamedTuple):
+    """One 10-year luck pillar; start/end are local standard time."""
+    pillar: str
+    start_age: float
+    start: dt.datetime
+    end: dt.datetime
+
+class AnnualPillar(NamedTuple):
+    """Pillar of one solar year, from its 立春 to the next (local standard time)."""
+    year: int
+    pillar: str
+    start: dt.datetime
+    end: dt.datetime
+
+class MonthlyPillar(NamedTuple):
+    """Pillar of one BaZi month (month 0 = 寅), from its 节 to the next."""
+    year: int
+    month: int
+    pillar: str
+    start: dt.datetime
+    end: dt.datetime
+
+class LifeTimeline(NamedTuple):
+    """Luck and annual pillars covering a lifetime."""
+    forward: bool
+    start_age: float
+    luck: tuple[LuckPillar, ...]
+    annual: tuple[AnnualPillar, ...]
+
+def is_forward(year_idx: int, gender: str) -> bool:
+    """Return True if luck pillars run forwards for this year pillar and gender.
+
+    Args:
+        year_idx: Year pillar index into JIA_ZI.
+        gender: "Male" or "Female" (case-insensitive).
+
+    Raises:
+        ValueError: If the gender is not recognized.
+    """
+    gender = gender.lower()
+    if gender not in ("male", "female"):
+        raise ValueError(f"Unknown gender {gender!r}; expected 'Male' or 'Female'")
+    yang_year = year_idx % 2 == 0
+    return yang_year == (gender == "male")
+
+def luck_pillars(result: BaziResult, gender: str, count: int = 8, mode: str | None = None) -> tuple[LuckPillar, ...]:
+    """Calculate the luck pillars of a natal chart.
+
+    Args:
+        result: Natal chart from calculate_bazi_with_solar_correction.
+        gender: "Male" or "Female".
+        count: Number of 10-year pillars.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        Tuple of LuckPillar in chronological order.
+
+    Raises:
+        ValueError: If the birth is outside the solar-term table range.
+    """
+    forward = is_forward(result.year_idx, gender)
+    start_age = _start_age(result, forward, resolve_mode(mode))
+    step = 1 if forward else -1
+    return tuple(
+        LuckPillar(
+            JIA_ZI[(result.month_idx + step * (i + 1)) % 60],
+            start_age + LUCK_PILLAR_YEARS * i,
+            _after_years(result.standard_dt, start_age + LUCK_PILLAR_YEARS * i),
+            _after_years(result.standard_dt, start_age + LUCK_PILLAR_YEARS * (i + 1)),
+        )
+        for i in range(count)
+    )
+
+def _start_age(result: BaziResult, forward: bool, mode: str) -> float:
+    """Age in years at which the first luck pillar begins."""
+    table = solar_term_table(mode)
+    # Same instant the calculator uses for the month pillar
+    jd = julian_day(result.solar_dt - dt.timedelta(hours=result.utc_offset))
+    pos = bisect_right(table, jd) - 1
+    if pos < 0 or pos >= len(table) - 1:
+        raise ValueError(f"{result.standard_dt} is outside the solar-term table range")
+    jie = pos - pos % 2
+    if forward:
+        if jie + 2 >= len(table):
+            raise ValueError(f"{result.standard_dt} is outside the solar-term table range")
+        days = table[jie + 2] - jd
+    else:
+        days = jd - table[jie]
+    return days / DAYS_PER_LUCK_YEAR
+
+def _after_years(start: dt.datetime, years: float) -> dt.datetime:
+    """Return the datetime a (tropical) number of years after start."""
+    return start + dt.timedelta(days=years * _DAYS_PER_YEAR)
+
+def _check_years(first_year: int, last_year: int) -> None:
+    if not FIRST_SOLAR_YEAR <= first_year <= last_year <= LAST_SOLAR_YEAR:
+        raise ValueError(f"Years {first_year}-{last_year} outside {FIRST_SOLAR_YEAR}-{LAST_SOLAR_YEAR}")
+
+def annual_pillars(first_year: int, last_year: int, utc_offset: float, mode: str | None = None) -> tuple[AnnualPillar, ...]:
+    """Calculate the annual pillars of a range of solar years.
+
+    Args:
+        first_year: First solar year.
+        last_year: Last solar year (inclusive).
+        utc_offset: UTC offset in hours used for the start/end times.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        Tuple of AnnualPillar, one per year.
+
+    Raises:
+        ValueError: If the range leaves the solar-term table.
+    """
+    _check_years(first_year, last_year)
+    mode = resolve_mode(mode)
+    return tuple(_annual_pillar(year, utc_offset, mode) for year in range(first_year, last_year + 1))
+
+@lru_cache(maxsize=4096)
+def _annual_pillar(year: int, utc_offset: float, mode: str) -> AnnualPillar:
+    table = solar_term_table(mode)
+    pos = (year - FIRST_SOLAR_YEAR) * TERMS_PER_YEAR
+    offset = dt.timedelta(hours=utc_offset)
+    return AnnualPillar(
+        year,
+        JIA_ZI[pillar_index((year - 4) % 10, (year - 4) % 12)],
+        boundary_utc(table[pos]) + offset,
+        boundary_utc(table[pos + TERMS_PER_YEAR]) + offset,
+    )
+
+def monthly_pillars(first_year: int, last_year: int, utc_offset: float, mode: str | None = None) -> tuple[MonthlyPillar, ...]:
+    """Calculate the monthly pillars of a range of solar years.
+
+    Args:
+        first_year: First solar year.
+        last_year: Last solar year (inclusive).
+        utc_offset: UTC offset in hours used for the start/end times.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        Tuple of MonthlyPillar, twelve per year.
+
+    Raises:
+        ValueError: If the range leaves the solar-term table.
+    """
+    _check_years(first_year, last_year)
+    mode = resolve_mode(mode)
+    return tuple(m for year in range(first_year, last_year + 1) for m in _monthly_pillars(year, utc_offset, mode))
+
+@lru_cache(maxsize=1024)
+def _monthly_pillars(year: int, utc_offset: float, mode: str) -> tuple[MonthlyPillar, ...]:
+    table = solar_term_table(mode)
+    base = (year - FIRST_SOLAR_YEAR) * TERMS_PER_YEAR
+    offset = dt.timedelta(hours=utc_offset)
+    y_stem_i = (year - 4) % 10
+    return tuple(
+        MonthlyPillar(
+            year,
+            m,
+            JIA_ZI[pillar_index((y_stem_i*2 + 2 + m) % 10, (m + 2) % 12)],
+            boundary_utc(table[base + 2*m]) + offset,
+            boundary_utc(table[base + 2*m + 2]) + offset,
+        )
+        for m in range(_MONTHS_PER_YEAR)
+    )
+
+def life_timeline(result: BaziResult, gender: str, years: int = 80, mode: str | None = None) -> LifeTimeline:
+    """Calculate luck and annual pillars from birth through a number of years.
+
+    Annual pillars are clipped to the solar-term table (through LAST_SOLAR_YEAR).
+
+    Args:
+        result: Natal chart from calculate_bazi_with_solar_correction.
+        gender: "Male" or "Female".
+        years: Length of the timeline in years.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        LifeTimeline with the direction, start age, luck and annual pillars.
+    """
+    mode = resolve_mode(mode)
+    forward = is_forward(result.year_idx, gender)
+    luck = luck_pillars(result, gender, -(-years // LUCK_PILLAR_YEARS), mode)
+    # Births before 立春 carry the previous solar year's pillar
+    birth_year = result.standard_dt.year
+    if (birth_year - 4) % 60 != result.year_idx:
+        birth_year -= 1
+    last_year = min(birth_year + years, LAST_SOLAR_YEAR)
+    annual = annual_pillars(birth_year, last_year, result.utc_offset, mode) if birth_year <= last_year else ()
+    return LifeTimeline(forward, luck[0].start_age if luck else 0.0, luck, annual)
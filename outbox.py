@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+# Durable outbox for lead and survey writes.
+#
+# A submission is committed to a local SQLite file (synchronous=FULL, so the
+# commit is fsynced) and the call returns; a drainer thread then delivers it
+# to the storage backend and deletes it. Failed deliveries stay in the
+# outbox and are retried with exponential backoff, so a storage outage
+# delays writes instead of losing them, and rows left by a crashed process
+# are delivered by the next one.
+#
+# Each entry carries an idempotency key: the lead's make_unique_key hash, or
+# a hash of a survey response's timestamp and user. The outbox ignores a
+# key it already holds. Delivery is at least once: an entry whose write
+# succeeded but whose deletion did not (e.g. a crash in between) is
+# delivered again. Leads are still stored once, since every backend skips
+# keys it already has. Survey responses are stored once by SQLiteStorage
+# (unique timestamp and user), but GoogleSheetsStorage only skips responses
+# still queued, so a redelivered response can appear twice in the sheet.
+# Processes sharing the file claim entries with a lease, so only one of
+# them delivers a given entry at a time.
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "outbox.sqlite")
+LEAD = "lead"
+SURVEY = "survey"
+DRAIN_BATCH_ROWS = 100
+POLL_INTERVAL_S = 1.0
+LEASE_S = 60.0
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 300.0
+
+def survey_key(row: list) -> str:
+    """Idempotency key of a survey response row ([timestamp, rating, user_id, name])."""
+    return hashlib.sha256(f"{row[0]}-{row[2]}-SURVEY".encode("utf-8")).hexdigest()
+
+class Outbox:
+    """SQLite-backed queue of pending writes with a background drainer."""
+
+    def __init__(self, deliver: Callable[[str, list[list]], None], path: str = OUTBOX_PATH) -> None:
+        """Open (creating if needed) the outbox.
+
+        Args:
+            deliver: Called as deliver(kind, rows) with LEAD or SURVEY and a
+                batch of rows; must raise if the rows were not stored.
+            path: SQLite file.
+        """
+        self.path = path
+        self._deliver = deliver
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"submitted": 0, "duplicates": 0, "delivered": 0, "failures": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " id INTEGER PRIMARY KEY, kind TEXT NOT NULL, key TEXT NOT NULL UNIQUE, row TEXT NOT NULL,"
+                " created REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt REAL NOT NULL DEFAULT 0, lease_until REAL NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 connections are per thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[stat] += n
+
+    def submit(self, kind: str, key: str, row: list) -> bool:
+        """Durably record a write and wake the drainer.
+
+        Args:
+            kind: LEAD or SURVEY.
+            key: Idempotency key.
+            row: Row to deliver (JSON-serializable values).
+
+        Returns:
+            True if recorded, False if an entry with this key is already pending.
+        """
+        conn = self._connection()
+        with conn:
+            added = conn.execute(
+                "INSERT OR IGNORE INTO outbox (kind, key, row, created) VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(row, default=str), time.time()),
+            ).rowcount
+        self._count("submitted" if added else "duplicates")
+        self.start()
+        self._wake.set()
+        return bool(added)
+
+    def pending_count(self) -> int:
+        """Number of entries not yet delivered."""
+        return self._connection().execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def _claim(self, now: float) -> list[tuple[int, str, int, list]]:
+        """Lease up to DRAIN_BATCH_ROWS due entries as (id, kind, attempts, row)."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            entries = conn.execute(
+                "SELECT id, kind, attempts, row FROM outbox"
+                " WHERE next_attempt <= ? AND lease_until <= ? ORDER BY id LIMIT ?",
+                (now, now, DRAIN_BATCH_ROWS),
+            ).fetchall()
+            conn.executemany("UPDATE outbox SET lease_until = ? WHERE id = ?",
+                             [(now + LEASE_S, entry[0]) for entry in entries])
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return [(id_, kind, attempts, json.loads(row)) for id_, kind, attempts, row in entries]
+
+    def drain_once(self) -> int:
+        """Deliver one batch of due entries.
+
+        Returns:
+            Number of entries delivered.
+        """
+        entries = self._claim(time.time())
+        conn = self._connection()
+        delivered = 0
+        for kind in (LEAD, SURVEY):
+            batch = [entry for entry in entries if entry[1] == kind]
+            if not batch:
+                continue
+            try:
+                self._deliver(kind, [entry[3] for entry in batch])
+            except Exception as err:
+                attempts = batch[0][2] + 1
+                delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+                with conn:
+                    conn.executemany(
+                        "UPDATE outbox SET attempts = attempts + 1, next_attempt = ?, lease_until = 0 WHERE id = ?",
+                        [(time.time() + delay, entry[0]) for entry in batch],
+                    )
+                self._count("failures")
+                logger.warning("Delivering %d %s rows failed (attempt %d): %s", len(batch), kind, attempts, err)
+                continue
+            with conn:
+                conn.executemany("DELETE FROM outbox WHERE id = ?", [(entry[0],) for entry in batch])
+            delivered += len(batch)
+        self._count("delivered", delivered)
+        return delivered
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(POLL_INTERVAL_S)
+            self._wake.clear()
+            try:
+                while self.drain_once():
+                    pass
+            except Exception as err:
+                logger.warning("Outbox drain failed: %s", err)
+
+    def start(self) -> None:
+        """Start the drainer thread (idempotent)."""
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="outbox-drainer", daemon=True)
+                    self._thread.start()
+
+_outbox: Outbox | None = None
+_outbox_lock = threading.Lock()
+
+def _deliver_to_storage(kind: str, rows: list[list]) -> None:
+    """Write a batch to the configured storage backend and make sure it is stored."""
+    from storage import get_storage
+    storage = get_storage()
+    if kind == LEAD:
+        storage.add_leads(rows)
+    else:
+        storage.add_survey_responses(rows)
+    storage.flush()
+
+def get_outbox() -> Outbox:
+    """Return the process-wide outbox (delivering to storage.get_storage()), draining any backlog."""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = Outbox(_deliver_to_storage)
+                _outbox.start()
+    return _outbox
@@ -0,0 +1,188 @@
+import datetime as dt
+from functools import lru_cache
+from typing import NamedTuple
+from bazi_calculator import pillar_index, solar_corrected_time
+from bazi_constants import BRANCH, JIA_ZI, ORD_EPOCH, STEM
+from ephemeris import resolve_mode
+from solar_terms import (
+    FIRST_SOLAR_YEAR, LAST_SOLAR_YEAR, TERMS_PER_YEAR, boundary_utc, solar_term_table
+)
+
+# Reverse lookup: which birth times produce a given set of pillars?
+#
+# Year and month pillars are fixed for each BaZi month (one 节 to the next),
+# so the index is just the ~2,400 months of 1900-2100 keyed by year and month
+# pillar. Day pillars repeat every 60 days from ORD_EPOCH and hour pillars
+# follow from the day stem, so matching days and hours inside a month are
+# found by modular arithmetic rather than by scanning.
+
+_MONTHS_PER_YEAR = TERMS_PER_YEAR // 2
+_ALL_PILLARS = frozenset(range(60))
+
+class PillarWindow(NamedTuple):
+    """Half-open time window [start, end) whose birth times match a pattern.
+
+    day and hour are None when the pattern leaves them unconstrained (they
+    vary across the window).
+    """
+    start: dt.datetime
+    end: dt.datetime
+    year: str
+    month: str
+    day: str | None
+    hour: str | None
+
+def parse_pillar_pattern(pattern: str | None) -> frozenset[int]:
+    """Return the JIA_ZI indices a pillar pattern accepts.
+
+    Args:
+        pattern: A full pillar ("甲子"), a single stem ("甲") or branch
+            ("子"), or None for any pillar.
+
+    Returns:
+        Frozen set of indices into JIA_ZI.
+
+    Raises:
+        ValueError: If the pattern is not a valid pillar, stem or branch.
+    """
+    if pattern is None:
+        return _ALL_PILLARS
+    if len(pattern) == 2 and pattern in JIA_ZI:
+        return frozenset((JIA_ZI.index(pattern),))
+    if len(pattern) == 1 and pattern in STEM:
+        return frozenset(i for i in range(60) if i % 10 == STEM.index(pattern))
+    if len(pattern) == 1 and pattern in BRANCH:
+        return frozenset(i for i in range(60) if i % 12 == BRANCH.index(pattern))
+    raise ValueError(f"Invalid pillar pattern {pattern!r}")
+
+@lru_cache(maxsize=None)
+def _month_index(mode: str) -> dict[int, list[tuple[int, int]]]:
+    """Map each year pillar index to its months as (table position, month pillar index)."""
+    table = solar_term_table(mode)
+    index = {}
+    for pos in range(0, len(table) - 1, 2):
+        year_offset, term = divmod(pos, TERMS_PER_YEAR)
+        y_stem_i = (FIRST_SOLAR_YEAR + year_offset - 4) % 10
+        m_branch_i = term // 2
+        year_i = pillar_index(y_stem_i, (FIRST_SOLAR_YEAR + year_offset - 4) % 12)
+        month_i = pillar_index((y_stem_i*2 + 2 + m_branch_i) % 10, (m_branch_i + 2) % 12)
+        index.setdefault(year_i, []).append((pos, month_i))
+    return index
+
+def _day_windows(start: dt.datetime, end: dt.datetime, days: frozenset[int]) -> list[tuple[dt.datetime, int]]:
+    """Return (solar start, day offset) for each matching BaZi day overlapping [start, end).
+
+    BaZi day d (offset from ORD_EPOCH) covers solar time from 23:00 on the
+    previous calendar day to 23:00 on its own day (子时 flip).
+    """
+    first = (start + dt.timedelta(hours=1)).date().toordinal() - ORD_EPOCH
+    last = (end - dt.timedelta(microseconds=1, hours=-1)).date().toordinal() - ORD_EPOCH
+    matches = []
+    for residue in days:
+        for d in range(first + (residue - first) % 60, last + 1, 60):
+            day_start = dt.datetime.fromordinal(d + ORD_EPOCH - 1) + dt.timedelta(hours=23)
+            matches.append((day_start, d))
+    matches.sort()
+    return matches
+
+def _standard_from_solar(solar: dt.datetime, local_longitude: float, utc_offset: float) -> dt.datetime:
+    """Invert solar_corrected_time (exact except within the sub-minute EoT step at midnight)."""
+    standard = solar
+    for _ in range(2):
+        corrected, naive, _, _ = solar_corrected_time(standard.date(), dt.time(0), local_longitude, utc_offset)
+        standard = solar - (corrected - naive)
+    return standard
+
+def find_pillar_windows(
+    year: str | None = None,
+    month: str | None = None,
+    day: str | None = None,
+    hour: str | None = None,
+    *,
+    utc_offset: float,
+    local_longitude: float | None = None,
+    first_year: int = FIRST_SOLAR_YEAR,
+    last_year: int = LAST_SOLAR_YEAR,
+    mode: str | None = None,
+) -> list[PillarWindow]:
+    """Find every time window whose births produce the given pillars.
+
+    Each pillar may be a full pillar ("甲子"), a single stem or branch, or
+    None for any. For example, day pillar 甲子 in a 寅 month is
+    `find_pillar_windows(month="寅", day="甲子", utc_offset=8)`.
+
+    Args:
+        year: Year pillar pattern.
+        month: Month pillar pattern.
+        day: Day pillar pattern.
+        hour: Hour pillar pattern.
+        utc_offset: UTC offset in hours.
+        local_longitude: Local longitude in degrees. When given, windows are
+            returned in local standard time; otherwise in solar-corrected
+            local time (longitude-independent).
+        first_year: First solar year to search.
+        last_year: Last solar year to search (inclusive).
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Returns:
+        PillarWindow tuples in chronological order.
+
+    Raises:
+        ValueError: If a pattern is invalid.
+    """
+    years = parse_pillar_pattern(year)
+    months = parse_pillar_pattern(month)
+    days = parse_pillar_pattern(day)
+    hours = parse_pillar_pattern(hour)
+    mode = resolve_mode(mode)
+    table = solar_term_table(mode)
+    term_offset = dt.timedelta(hours=utc_offset)
+    pos_range = range(
+        (max(first_year, FIRST_SOLAR_YEAR) - FIRST_SOLAR_YEAR) * TERMS_PER_YEAR,
+        (min(last_year, LAST_SOLAR_YEAR) - FIRST_SOLAR_YEAR + 1) * TERMS_PER_YEAR,
+    )
+    # Hour branches matching the hour pattern, per day stem
+    hour_branches = [
+        [b for b in range(12) if pillar_index((2*day_stem + b) % 10, b) in hours]
+        for day_stem in range(10)
+    ]
+
+    candidates = []
+    for year_i, month_list in _month_index(mode).items():
+        if year_i in years:
+            candidates.extend((pos, year_i, month_i) for pos, month_i in month_list
+                              if month_i in months and pos in pos_range)
+    candidates.sort()
+
+    windows = []
+    for pos, year_i, month_i in candidates:
+        m_start = boundary_utc(table[pos]) + term_offset
+        m_end = boundary_utc(table[pos + 2]) + term_offset
+        if day is None and hour is None:
+            windows.append((m_start, m_end, year_i, month_i, None, None))
+            continue
+        for day_start, d in _day_windows(m_start, m_end, days):
+            if hour is None:
+                spans = [(day_start, day_start + dt.timedelta(days=1), None)]
+            else:
+                spans = [
+                    (day_start + dt.timedelta(hours=2*b), day_start + dt.timedelta(hours=2*b + 2),
+                     pillar_index((2*(d % 10) + b) % 10, b))
+                    for b in hour_branches[d % 10]
+                ]
+            for w_start, w_end, hour_i in spans:
+                w_start, w_end = max(w_start, m_start), min(w_end, m_end)
+                if w_start < w_end:
+                    windows.append((w_start, w_end, year_i, month_i, d % 60, hour_i))
+
+    if local_longitude is not None:
+        windows = [
+            (_standard_from_solar(s, local_longitude, utc_offset),
+             _standard_from_solar(e, local_longitude, utc_offset), *rest)
+            for s, e, *rest in windows
+        ]
+    return [
+        PillarWindow(s, e, JIA_ZI[y], JIA_ZI[m],
+                     None if d is None else JIA_ZI[d], None if h is None else JIA_ZI[h])
+        for s, e, y, m, d, h in windows
+    ]
@@ -0,0 +1,104 @@
+import datetime as dt
+from bisect import bisect_right
+from typing import Iterator, NamedTuple
+from bazi_calculator import hour_branch_idx, pillar_index, solar_corrected_time
+from bazi_constants import JIA_ZI, ORD_EPOCH
+from solar_terms import (
+    FIRST_SOLAR_YEAR, TERMS_PER_YEAR, boundary_utc, julian_day, solar_term_table
+)
+
+# Pillars only change at a handful of instants: every odd solar hour (hour
+# branch, and the day pillar at 23:00 子时) and every solar-term boundary
+# (month and year). The generator below walks those boundaries directly
+# instead of evaluating the calculator minute by minute.
+
+class PillarInterval(NamedTuple):
+    """Half-open interval [start, end) of local standard time with constant pillars."""
+    start: dt.datetime
+    end: dt.datetime
+    year: str
+    month: str
+    day: str
+    hour: str
+
+def _solar_offset(day: dt.date, local_longitude: float, utc_offset: float) -> dt.timedelta:
+    """Return solar-corrected minus standard time for a calendar day."""
+    corrected, naive, _, _ = solar_corrected_time(day, dt.time(0), local_longitude, utc_offset)
+    return corrected - naive
+
+def _next_branch_hour(solar_dt: dt.datetime) -> dt.datetime:
+    """Return the next odd hour strictly after solar_dt (start of the next hour branch)."""
+    hour_start = solar_dt.replace(minute=0, second=0, microsecond=0)
+    return hour_start + dt.timedelta(hours=2 if solar_dt.hour % 2 else 1)
+
+def iter_pillar_intervals(start: dt.datetime, end: dt.datetime, local_longitude: float, utc_offset: float, mode: str | None = None) -> Iterator[PillarInterval]:
+    """Yield the intervals over which the four pillars stay constant.
+
+    Pillars match calculate_bazi_with_solar_correction for every birth time
+    inside each interval (to the second). Memory use is constant, so
+    arbitrarily long ranges can be streamed.
+
+    Args:
+        start: Start of the range, naive local standard time (inclusive).
+        end: End of the range, naive local standard time (exclusive).
+        local_longitude: Local longitude in degrees.
+        utc_offset: UTC offset in hours.
+        mode: Ephemeris engine ("fast"/"precise"), or None for the global default.
+
+    Yields:
+        PillarInterval tuples in chronological order.
+
+    Raises:
+        ValueError: If the range leaves the precomputed solar-term table.
+    """
+    table = solar_term_table(mode)
+    term_offset = dt.timedelta(hours=utc_offset)
+
+    def term_boundary(pos: int) -> dt.datetime:
+        return boundary_utc(table[pos]) + term_offset
+
+    run_start = None
+    run_pillars = None
+    cur = start
+    day = None
+    while cur < end:
+        if cur.date() != day:
+            day = cur.date()
+            delta = _solar_offset(day, local_longitude, utc_offset)
+            day_end = dt.datetime.combine(day + dt.timedelta(days=1), dt.time(0))
+            solar = cur + delta
+            pos = bisect_right(table, julian_day((solar - term_offset).replace(microsecond=0))) - 1
+            if pos < 0 or pos >= len(table) - 1:
+                raise ValueError(f"{cur} is outside the solar-term table range")
+            next_term = term_boundary(pos + 1)
+        else:
+            solar = cur + delta
+        while solar >= next_term:
+            pos += 1
+            if pos >= len(table) - 1:
+                raise ValueError(f"{cur} is outside the solar-term table range")
+            next_term = term_boundary(pos + 1)
+
+        # Year and month pillars from the solar term position
+        year_offset, term = divmod(pos, TERMS_PER_YEAR)
+        y_stem_i = (FIRST_SOLAR_YEAR + year_offset - 4) % 10
+        m_branch_i = term // 2
+        year_i = pillar_index(y_stem_i, (FIRST_SOLAR_YEAR + year_offset - 4) % 12)
+        month_i = pillar_index((y_stem_i*2 + 2 + m_branch_i) % 10, (m_branch_i + 2) % 12)
+
+        # Day and hour pillars, flipping the day at 子时 (23:00)
+        bazi_day = solar.date() + dt.timedelta(days=1) if solar.hour == 23 else solar.date()
+        offset = bazi_day.toordinal() - ORD_EPOCH
+        h_branch_i = hour_branch_idx(solar.hour)
+        hour_i = pillar_index((2 * (offset % 10) + h_branch_i) % 10, h_branch_i)
+        pillars = (year_i, month_i, offset % 60, hour_i)
+
+        seg_end = min(min(_next_branch_hour(solar), next_term) - delta, day_end, end)
+        if pillars != run_pillars:
+            if run_pillars is not None:
+                yield PillarInterval(run_start, cur, *(JIA_ZI[i] for i in run_pillars))
+            run_start, run_pillars = cur, pillars
+        cur = seg_end
+
+    if run_pillars is not None:
+        yield PillarInterval(run_start, end, *(JIA_ZI[i] for i in run_pillars))
@@ -0,0 +1,138 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+# Token-bucket scheduling for a shared API quota.
+#
+# Callers take one token per request. Tokens refill continuously at
+# rate_per_s up to capacity (the burst). Waiting callers are served by
+# priority (lower value first) and then in arrival order, and only the head
+# of the queue takes tokens, so a burst of low-priority work cannot starve
+# a high-priority request that arrives later. Throughput therefore stays at
+# the quota instead of overshooting it and collapsing into retry storms.
+#
+# With a state_path the bucket (tokens and last refill time) lives in a
+# small file guarded by fcntl.flock, so every process on the host shares one
+# quota; priorities then order callers within each process. penalize()
+# empties the bucket for a while when the server still answers 429.
+
+class TokenBucket:
+    """Priority-ordered token bucket, process-wide or shared through a lock file."""
+
+    def __init__(self, rate_per_s: float, capacity: float, state_path: str | None = None) -> None:
+        """Create a full bucket.
+
+        Args:
+            rate_per_s: Tokens added per second.
+            capacity: Most tokens held at once (largest burst).
+            state_path: Optional file holding the bucket state, shared by
+                every process using the same path (POSIX only).
+        """
+        self.rate_per_s = rate_per_s
+        self.capacity = capacity
+        self.state_path = state_path
+        self._cond = threading.Condition()
+        self._waiters: list[tuple[int, int]] = []   # heap of (priority, arrival)
+        self._arrivals = itertools.count()
+        self._tokens = float(capacity)
+        self._stamp = time.time()
+        self._fd = None
+        self.stats = {"granted": 0, "timeouts": 0, "waited_s": 0.0, "penalties": 0}
+        if state_path is not None:
+            os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+            self._fd = os.open(state_path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    # ————————————————————————————————————————————————————
+    # Bucket state
+    # ————————————————————————————————————————————————————
+    def _update(self, change) -> float:
+        """Refill the bucket, apply change(tokens) -> (tokens, result) and return result.
+
+        Caller holds self._cond. The state is read and written under an
+        exclusive file lock when shared.
+        """
+        now = time.time()
+        if self._fd is None:
+            tokens = min(self.capacity, self._tokens + max(0.0, now - self._stamp) * self.rate_per_s)
+            self._tokens, result = change(tokens)
+            self._stamp = now
+            return result
+        import fcntl
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            raw = os.pread(self._fd, 64, 0).split()
+            tokens, stamp = (float(raw[0]), float(raw[1])) if len(raw) == 2 else (float(self.capacity), now)
+            tokens = min(self.capacity, tokens + max(0.0, now - stamp) * self.rate_per_s)
+            tokens, result = change(tokens)
+            state = f"{tokens!r} {now!r}".encode("ascii").ljust(64)
+            os.pwrite(self._fd, state, 0)
+            return result
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _try_take(self) -> float:
+        """Take a token if one is available; return 0, or the seconds until one will be."""
+        def take(tokens: float) -> tuple[float, float]:
+            if tokens >= 1:
+                return tokens - 1, 0.0
+            return tokens, (1 - tokens) / self.rate_per_s
+        return self._update(take)
+
+    def tokens(self) -> float:
+        """Tokens currently available (negative while penalized)."""
+        with self._cond:
+            return self._update(lambda tokens: (tokens, tokens))
+
+    def penalize(self, seconds: float) -> None:
+        """Empty the bucket so no token is granted for the next `seconds` (e.g. after a 429)."""
+        with self._cond:
+            self._update(lambda tokens: (min(tokens, 0.0) - seconds * self.rate_per_s, None))
+            self.stats["penalties"] += 1
+
+    # ————————————————————————————————————————————————————
+    # Scheduling
+    # ————————————————————————————————————————————————————
+    def acquire(self, priority: int = 0, timeout: float | None = None) -> bool:
+        """Block until a token is granted.
+
+        Args:
+            priority: Lower values are served first.
+            timeout: Seconds to wait at most, or None to wait indefinitely.
+
+        Returns:
+            True if a token was taken, False on timeout.
+        """
+        start = time.monotonic()
+        entry = (priority, next(self._arrivals))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    wait = None
+                    if self._waiters[0] == entry:
+                        wait = self._try_take()
+                        if wait == 0:
+                            self.stats["granted"] += 1
+                            self.stats["waited_s"] += time.monotonic() - start
+                            return True
+                    if timeout is not None:
+                        remaining = timeout - (time.monotonic() - start)
+                        if remaining <= 0:
+                            self.stats["timeouts"] += 1
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def queue_depth(self) -> dict[int, int]:
+        """Number of callers waiting, per priority."""
+        with self._cond:
+            depth: dict[int, int] = {}
+            for priority, _ in self._waiters:
+                depth[priority] = depth.get(priority, 0) + 1
+            return depth
@@ -0,0 +1,190 @@
+import atexit
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+# Background batch writer for Google Sheets rows.
+#
+# UI code enqueues a row and returns at once. A daemon thread flushes each
+# worksheet's queue with a single append_rows call when it reaches
+# max_batch_rows or when its oldest row has waited flush_interval_s. A
+# failed flush keeps the rows queued (in order) and retries that worksheet
+# with exponential backoff and jitter. Queued rows are flushed on
+# interpreter shutdown.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_ROWS = 50
+DEFAULT_FLUSH_INTERVAL_S = 2.0
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 60.0
+SHUTDOWN_TIMEOUT_S = 10.0
+
+class _TabQueue:
+    """Rows waiting for one worksheet plus its retry state."""
+    def __init__(self) -> None:
+        self.rows: list[list] = []
+        self.in_flight: list[list] = []
+        self.first_queued = 0.0
+        self.failures = 0
+        self.retry_at = 0.0
+
+class BatchWriter:
+    """Queue rows per worksheet and append them in batches from a background thread."""
+
+    def __init__(self, append_rows: Callable[[str, list[list]], None],
+                 max_batch_rows: int = DEFAULT_MAX_BATCH_ROWS,
+                 flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S) -> None:
+        """Create a writer (the thread starts on the first enqueue).
+
+        Args:
+            append_rows: Called as append_rows(tab_name, rows) to write one batch.
+            max_batch_rows: Queue size that triggers an immediate flush.
+            flush_interval_s: Longest a row waits before its worksheet is flushed.
+        """
+        self._append_rows = append_rows
+        self.max_batch_rows = max_batch_rows
+        self.flush_interval_s = flush_interval_s
+        self._queues: dict[str, _TabQueue] = {}
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()     # one batch in flight at a time
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "failures": 0}
+
+    def enqueue(self, tab_name: str, row: list) -> None:
+        """Queue a row for a worksheet and return immediately."""
+        with self._cond:
+            queue = self._queues.setdefault(tab_name, _TabQueue())
+            if not queue.rows:
+                queue.first_queued = time.monotonic()
+            queue.rows.append(row)
+            self.stats["enqueued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sheet-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self, tab_name: str) -> list[list]:
+        """Return the rows queued or being written for a worksheet (a copy)."""
+        with self._cond:
+            queue = self._queues.get(tab_name)
+            return queue.in_flight + queue.rows if queue else []
+
+    def _due(self, queue: _TabQueue, now: float) -> bool:
+        if not queue.rows or now < queue.retry_at:
+            return False
+        return (self._stopping or len(queue.rows) >= self.max_batch_rows
+                or now - queue.first_queued >= self.flush_interval_s)
+
+    def _next_wake(self, now: float) -> float | None:
+        """Seconds until some worksheet becomes due, or None if nothing is queued."""
+        waits = [
+            max(queue.retry_at, queue.first_queued + self.flush_interval_s) - now
+            for queue in self._queues.values() if queue.rows
+        ]
+        return max(0.0, min(waits)) if waits else None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                while not self._stopping and not any(self._due(q, now) for q in self._queues.values()):
+                    self._cond.wait(self._next_wake(now))
+                    now = time.monotonic()
+                if self._stopping:
+                    return
+                due = [tab for tab, q in self._queues.items() if self._due(q, now)]
+            for tab_name in due:
+                self._flush_tab(tab_name)
+
+    def _flush_tab(self, tab_name: str) -> bool:
+        """Write one worksheet's queued rows; return False if the write failed."""
+        with self._write_lock:
+            return self._write_batch(tab_name)
+
+    def _write_batch(self, tab_name: str) -> bool:
+        with self._cond:
+            queue = self._queues[tab_name]
+            batch = queue.in_flight = queue.rows
+            queue.rows = []
+        if not batch:
+            return True
+        try:
+            self._append_rows(tab_name, batch)
+        except Exception as err:
+            with self._cond:
+                # Put the batch back ahead of anything queued meanwhile
+                queue.rows = batch + queue.rows
+                queue.in_flight = []
+                queue.failures += 1
+                delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (queue.failures - 1))
+                queue.retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                self.stats["failures"] += 1
+            logger.warning("Writing %d rows to %r failed (attempt %d): %s", len(batch), tab_name, queue.failures, err)
+            return False
+        with self._cond:
+            queue.in_flight = []
+            queue.failures = 0
+            queue.retry_at = 0.0
+            if queue.rows:
+                queue.first_queued = time.monotonic()
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        return True
+
+    def flush(self, timeout_s: float = SHUTDOWN_TIMEOUT_S) -> bool:
+        """Synchronously write everything queued, retrying with backoff until timeout.
+
+        Returns:
+            True if all queues were emptied.
+        """
+        deadline = time.monotonic() + timeout_s
+        while True:
+            with self._cond:
+                tabs = [tab for tab, q in self._queues.items() if q.rows]
+            if not tabs:
+                return True
+            for tab_name in tabs:
+                self._flush_tab(tab_name)
+            with self._cond:
+                waits = [q.retry_at for q in self._queues.values() if q.rows]
+            if not waits:
+                return True
+            sleep = min(waits) - time.monotonic()
+            if time.monotonic() + max(sleep, 0) >= deadline:
+                return False
+            time.sleep(max(sleep, 0))
+
+    def close(self, timeout_s: float = SHUTDOWN_TIMEOUT_S) -> bool:
+        """Stop the background thread and flush what is left.
+
+        Returns:
+            True if all queued rows were written.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout_s)
+        written = self.flush(timeout_s)
+        if not written:
+            remaining = sum(len(q.rows) for q in self._queues.values())
+            logger.error("Sheet writer shut down with %d unwritten rows", remaining)
+        return written
+
+_writer: BatchWriter | None = None
+_writer_lock = threading.Lock()
+
+def get_writer(append_rows: Callable[[str, list[list]], None]) -> BatchWriter:
+    """Return the process-wide writer, creating it (and its atexit flush) on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BatchWriter(append_rows)
+                atexit.register(_writer.close)
+    return _writer
@@ -0,0 +1,169 @@
+import datetime as dt
+from bisect import bisect_right
+from functools import lru_cache
+from ephemeris import resolve_mode, solar_longitude
+
+# Solar terms (节气) are indexed from 立春 (Lichun, sun at 315°) in 15° steps.
+# Even-numbered terms (节) start the BaZi months: term 0 opens the 寅 month,
+# term 2 the 卯 month, ..., term 22 the 丑 month.
+SOLAR_TERM_NAMES = [
+    "立春", "雨水", "惊蛰", "春分", "清明", "谷雨",
+    "立夏", "小满", "芒种", "夏至", "小暑", "大暑",
+    "立秋", "处暑", "白露", "秋分", "寒露", "霜降",
+    "立冬", "小雪", "大雪", "冬至", "小寒", "大寒",
+]
+TERMS_PER_YEAR = 24
+FIRST_SOLAR_YEAR = 1900
+LAST_SOLAR_YEAR = 2100
+
+_JD_UNIX_EPOCH = 2440587.5          # 1970-01-01 00:00 UTC
+_TROPICAL_YEAR = 365.2422           # days
+_NEWTON_TOL = 1e-8                  # days (~1 ms)
+
+# ————————————————————————————————————————————————————
+# Time Conversion
+# ————————————————————————————————————————————————————
+def julian_day(utc: dt.datetime) -> float:
+    """Calculate the Julian day from a UTC datetime.
+
+    Args:
+        utc: UTC datetime.
+
+    Returns:
+        Julian day as float.
+    """
+    y, m = utc.year, utc.month
+    d = utc.day + (utc.hour + utc.minute/60 + utc.second/3600)/24
+    if m <= 2:
+        y, m = y - 1, m + 12
+    A = y // 100
+    B = 2 - A + A // 4
+    return int(365.25*(y+4716)) + int(30.6001*(m+1)) + d + B - 1524.5
+
+def utc_from_julian_day(jd: float) -> dt.datetime:
+    """Convert a Julian day back to a naive UTC datetime.
+
+    Args:
+        jd: Julian day.
+
+    Returns:
+        Naive UTC datetime (microsecond resolution).
+    """
+    return dt.datetime(1970, 1, 1) + dt.timedelta(days=jd - _JD_UNIX_EPOCH)
+
+def boundary_utc(jd: float) -> dt.datetime:
+    """Return the first whole UTC second at or after a solar-term instant.
+
+    The calculator resolves instants to the second, so this is when a
+    term boundary takes effect for pillar purposes.
+
+    Args:
+        jd: Julian day (UT) of the boundary.
+
+    Returns:
+        Naive UTC datetime with no microseconds.
+    """
+    moment = utc_from_julian_day(jd)
+    if moment.microsecond:
+        return moment.replace(microsecond=0) + dt.timedelta(seconds=1)
+    return moment
+
+# ————————————————————————————————————————————————————
+# Solar Term Table
+# ————————————————————————————————————————————————————
+def term_longitude(term: int) -> float:
+    """Return the solar longitude (degrees) at which a solar term begins.
+
+    Args:
+        term: Term index (0 = 立春 ... 23 = 大寒).
+
+    Returns:
+        Sun longitude in degrees.
+    """
+    return (315 + 15 * term) % 360
+
+def find_longitude_crossing(target_lon: float, jd_guess: float, mode: str | None = None) -> float:
+    """Find the instant the sun reaches a given longitude by Newton iteration.
+
+    Args:
+        target_lon: Target sun longitude in degrees.
+        jd_guess: Julian day within a few days of the crossing.
+        mode: Ephemeris engine name, or None for the global default.
+
+    Returns:
+        Julian day (UT) of the crossing.
+    """
+    jd = jd_guess
+    for _ in range(50):
+        diff = (target_lon - solar_longitude(jd, mode) + 180) % 360 - 180
+        step = diff * _TROPICAL_YEAR / 360
+        jd += step
+        if abs(step) < _NEWTON_TOL:
+            break
+    return jd
+
+def solar_term_table(mode: str | None = None) -> tuple[float, ...]:
+    """Return the table of solar term instants for FIRST_SOLAR_YEAR..LAST_SOLAR_YEAR.
+
+    Entry (year - FIRST_SOLAR_YEAR) * TERMS_PER_YEAR + term holds the Julian
+    day (UT) at which `term` of solar `year` begins; a final entry holds the
+    立春 of LAST_SOLAR_YEAR + 1 so the last year is closed. Built once per
+    process and ephemeris mode by root-finding on the solar longitude.
+
+    Args:
+        mode: Ephemeris engine name, or None for the global default.
+
+    Returns:
+        Sorted tuple of Julian days.
+    """
+    return _build_solar_term_table(resolve_mode(mode))
+
+@lru_cache(maxsize=None)
+def _build_solar_term_table(mode: str) -> tuple[float, ...]:
+    """Root-find every solar term instant with the given engine."""
+    table = []
+    for year in range(FIRST_SOLAR_YEAR, LAST_SOLAR_YEAR + 2):
+        # 立春 falls around Feb 4; later terms follow at ~15.2 day spacing
+        jd_guess = julian_day(dt.datetime(year, 2, 4))
+        for term in range(TERMS_PER_YEAR):
+            jd = find_longitude_crossing(term_longitude(term), jd_guess, mode)
+            table.append(jd)
+            if year > LAST_SOLAR_YEAR:
+                return tuple(table)
+            jd_guess = jd + _TROPICAL_YEAR / TERMS_PER_YEAR
+    return tuple(table)
+
+def solar_term_jd(year: int, term: int, mode: str | None = None) -> float:
+    """Return the Julian day (UT) at which a solar term begins.
+
+    Args:
+        year: Solar year (the year whose 立春 opens it).
+        term: Term index (0-23).
+        mode: Ephemeris engine name, or None for the global default.
+
+    Returns:
+        Julian day (UT).
+
+    Raises:
+        ValueError: If the year is outside the table range.
+    """
+    if not FIRST_SOLAR_YEAR <= year <= LAST_SOLAR_YEAR:
+        raise ValueError(f"Solar year {year} outside {FIRST_SOLAR_YEAR}-{LAST_SOLAR_YEAR}")
+    return solar_term_table(mode)[(year - FIRST_SOLAR_YEAR) * TERMS_PER_YEAR + term]
+
+def solar_term_at(jd: float, mode: str | None = None) -> tuple[int, int] | None:
+    """Find the solar term in effect at a given instant.
+
+    Args:
+        jd: Julian day (UT).
+        mode: Ephemeris engine name, or None for the global default.
+
+    Returns:
+        Tuple of (solar year, term index 0-23), or None outside the table range.
+    """
+    table = solar_term_table(mode)
+    pos = bisect_right(table, jd) - 1
+    if pos < 0 or pos >= len(table) - 1:
+        return None
+    year_offset, term = divmod(pos, TERMS_PER_YEAR)
+    return FIRST_SOLAR_YEAR + year_offset, term
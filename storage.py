@@ -0,0 +1,362 @@
+import datetime as dt
+import os
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+
+# Persistence for leads and survey responses behind one interface.
+#
+# GoogleSheetsStorage is the production backend (batched background writes
+# through gsheet_helpers). SQLiteStorage keeps the same data in a local WAL
+# database with an indexed key column and executemany batch inserts, so the
+# app runs, and can be load-tested, without Google credentials or quota.
+#
+# The backend is chosen by the MYELEMENT_STORAGE environment variable
+# ("sheets", the default, or "sqlite"); MYELEMENT_SQLITE_PATH overrides the
+# database file. sync_storage copies rows missing from one backend into the
+# other, e.g. to export locally collected leads to the sheet:
+#
+#   python storage.py sqlite sheets
+#
+# Rows are lists in the sheet's column order (LEAD_COLUMNS, SURVEY_COLUMNS).
+# The app's save_lead/save_survey_response go through the durable outbox
+# (outbox.py), which delivers to the selected backend.
+
+LEAD_COLUMNS = ["key", "timestamp", "name", "email", "country", "dob", "birth_time", "gender", "kind"]
+SURVEY_COLUMNS = ["timestamp", "rating", "user_id", "name"]
+SQLITE_STORAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "storage.sqlite")
+STORAGE_ENV = "MYELEMENT_STORAGE"
+SQLITE_PATH_ENV = "MYELEMENT_SQLITE_PATH"
+SYNC_BATCH_ROWS = 500
+
+def _response_id(row: list) -> tuple[str, str]:
+    """Identity of a survey response: (timestamp, user_id) as text."""
+    return str(row[0]), str(row[2]) if len(row) > 2 and row[2] is not None else ""
+
+class Storage(ABC):
+    """Where leads and survey responses are kept."""
+
+    @abstractmethod
+    def add_lead(self, row: list) -> str:
+        """Store a lead unless its key (row[0]) exists.
+
+        Returns:
+            'added' or 'duplicate'.
+        """
+
+    @abstractmethod
+    def add_leads(self, rows: Iterable[list]) -> int:
+        """Store many leads, skipping existing keys.
+
+        Returns:
+            Number of leads added.
+        """
+
+    @abstractmethod
+    def get_lead(self, key: str) -> list | None:
+        """Return the lead row with this key, or None."""
+
+    @abstractmethod
+    def iter_leads(self) -> Iterator[list]:
+        """Yield every lead row."""
+
+    @abstractmethod
+    def add_survey_responses(self, rows: Iterable[list]) -> int:
+        """Store survey response rows.
+
+        Returns:
+            Number of rows added.
+        """
+
+    @abstractmethod
+    def iter_survey_responses(self) -> Iterator[list]:
+        """Yield every survey response row."""
+
+    def add_survey_response(self, row: list) -> None:
+        """Store one survey response row."""
+        self.add_survey_responses([row])
+
+    def has_lead(self, key: str) -> bool:
+        """Return True if a lead with this key exists."""
+        return self.get_lead(key) is not None
+
+    def peek_lead(self, key: str) -> bool | None:
+        """Tell whether a lead exists from local state only (no network call, no waiting).
+
+        Returns:
+            True/False, or None if that cannot be told locally.
+        """
+        return None
+
+    def flush(self) -> None:
+        """Write out anything buffered (no-op for unbuffered backends).
+
+        Raises:
+            Exception: If buffered rows could not be written.
+        """
+
+# ————————————————————————————————————————————————————
+# Google Sheets
+# ————————————————————————————————————————————————————
+class GoogleSheetsStorage(Storage):
+    """The prospects and survey worksheets (writes are queued and batched)."""
+
+    def __init__(self) -> None:
+        # Imported here so the SQLite backend works without streamlit/gspread credentials
+        import gsheet_helpers
+        self._sheets = gsheet_helpers
+
+    def _values(self, tab_name: str) -> list[list]:
+        """All rows of a worksheet plus those still queued, header row dropped."""
+        rows = self._sheets.with_worksheet(tab_name, lambda ws: ws.get_all_values())
+        if rows and rows[0] and rows[0][0].casefold() in ("key", "timestamp"):
+            rows = rows[1:]
+        return rows + self._sheets.get_writer(self._sheets._append_rows).pending(tab_name)
+
+    def add_lead(self, row: list) -> str:
+        return self._sheets.queue_lead(row)
+
+    def add_leads(self, rows: Iterable[list]) -> int:
+        return sum(self._sheets.queue_lead(row) == "added" for row in rows)
+
+    def get_lead(self, key: str) -> list | None:
+        for row in self._values(self._sheets.PROSPECTS_SHEET_NAME):
+            if row and row[0] == key:
+                return row
+        return None
+
+    def has_lead(self, key: str) -> bool:
+        return self._sheets.is_known_lead(key)
+
+    def peek_lead(self, key: str) -> bool | None:
+        return self._sheets.peek_known_lead(key)
+
+    def iter_leads(self) -> Iterator[list]:
+        return iter(self._values(self._sheets.PROSPECTS_SHEET_NAME))
+
+    def add_survey_responses(self, rows: Iterable[list]) -> int:
+        # Only responses still queued are skipped; there is no index of those
+        # already in the sheet, so a response delivered again after its write
+        # succeeded (e.g. the acknowledgement was lost) is written twice.
+        writer = self._sheets.get_writer(self._sheets._append_rows)
+        queued = {_response_id(row) for row in writer.pending(self._sheets.SURVEY_SHEET_NAME)}
+        count = 0
+        for row in rows:
+            if _response_id(row) not in queued:
+                self._sheets.queue_survey_row(row)
+                queued.add(_response_id(row))
+                count += 1
+        return count
+
+    def iter_survey_responses(self) -> Iterator[list]:
+        return iter(self._values(self._sheets.SURVEY_SHEET_NAME))
+
+    def flush(self) -> None:
+        if not self._sheets.flush_pending_rows():
+            raise RuntimeError("Queued sheet rows could not be written")
+
+# ————————————————————————————————————————————————————
+# SQLite
+# ————————————————————————————————————————————————————
+class SQLiteStorage(Storage):
+    """Local SQLite database in WAL mode (one connection per thread)."""
+
+    def __init__(self, path: str = SQLITE_STORAGE_PATH) -> None:
+        """Open (creating if needed) the database.
+
+        Args:
+            path: SQLite file.
+        """
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        lead_cols = ", ".join(f"{c} TEXT" for c in LEAD_COLUMNS[1:])
+        with self._connection() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS leads (key TEXT PRIMARY KEY, {lead_cols})")
+            conn.execute("CREATE INDEX IF NOT EXISTS leads_timestamp ON leads (timestamp)")
+            # A response is identified by its timestamp and user, so re-syncing is idempotent
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS survey ("
+                " id INTEGER PRIMARY KEY, timestamp TEXT, rating INTEGER, user_id TEXT, name TEXT,"
+                " UNIQUE (timestamp, user_id))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 connections are per thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _pad(row: list, width: int) -> list:
+        """Fit a row to the table width (sheet rows may omit trailing blanks)."""
+        return (list(row) + [None] * width)[:width]
+
+    def add_lead(self, row: list) -> str:
+        return "added" if self.add_leads([row]) else "duplicate"
+
+    def add_leads(self, rows: Iterable[list]) -> int:
+        conn = self._connection()
+        placeholders = ", ".join("?" * len(LEAD_COLUMNS))
+        with conn:
+            before = conn.total_changes
+            conn.executemany(f"INSERT OR IGNORE INTO leads VALUES ({placeholders})",
+                             (self._pad(row, len(LEAD_COLUMNS)) for row in rows))
+            return conn.total_changes - before
+
+    def get_lead(self, key: str) -> list | None:
+        row = self._connection().execute("SELECT * FROM leads WHERE key = ?", (key,)).fetchone()
+        return list(row) if row else None
+
+    def peek_lead(self, key: str) -> bool | None:
+        return self.has_lead(key)
+
+    def iter_leads(self) -> Iterator[list]:
+        for row in self._connection().execute("SELECT * FROM leads ORDER BY timestamp"):
+            yield list(row)
+
+    def add_survey_responses(self, rows: Iterable[list]) -> int:
+        conn = self._connection()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO survey (timestamp, rating, user_id, name) VALUES (?, ?, ?, ?)",
+                (self._pad(row, len(SURVEY_COLUMNS)) for row in rows),
+            )
+            return conn.total_changes - before
+
+    def iter_survey_responses(self) -> Iterator[list]:
+        for row in self._connection().execute(
+            "SELECT timestamp, rating, user_id, name FROM survey ORDER BY id"
+        ):
+            yield list(row)
+
+# ————————————————————————————————————————————————————
+# Selection and sync
+# ————————————————————————————————————————————————————
+_storage: Storage | None = None
+_storage_lock = threading.Lock()
+
+def make_storage(backend: str, sqlite_path: str | None = None) -> Storage:
+    """Create a backend by name.
+
+    Args:
+        backend: "sheets" or "sqlite".
+        sqlite_path: Database file for "sqlite" (default SQLITE_STORAGE_PATH).
+
+    Returns:
+        Storage.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if backend == "sheets":
+        return GoogleSheetsStorage()
+    if backend == "sqlite":
+        return SQLiteStorage(sqlite_path or SQLITE_STORAGE_PATH)
+    raise ValueError(f"Unknown storage backend {backend!r} (expected 'sheets' or 'sqlite')")
+
+def get_storage() -> Storage:
+    """Return the process-wide backend selected by MYELEMENT_STORAGE."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = make_storage(os.environ.get(STORAGE_ENV, "sheets").strip().lower(),
+                                        os.environ.get(SQLITE_PATH_ENV))
+    return _storage
+
+def _batches(rows: Iterable[list], size: int) -> Iterator[list[list]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def sync_storage(source: Storage, target: Storage, batch_rows: int = SYNC_BATCH_ROWS) -> dict[str, int]:
+    """Copy leads and survey responses missing from target out of source.
+
+    Leads are matched by key and survey responses by (timestamp, user_id),
+    so running a sync again copies nothing new.
+
+    Args:
+        source: Backend to read.
+        target: Backend to write.
+        batch_rows: Rows per batched write.
+
+    Returns:
+        Dict with the number of "leads" and "survey_responses" copied.
+    """
+    lead_keys = {row[0] for row in target.iter_leads() if row}
+    new_leads = (row for row in source.iter_leads() if row and row[0] not in lead_keys)
+    leads = sum(target.add_leads(batch) for batch in _batches(new_leads, batch_rows))
+
+    response_ids = {_response_id(row) for row in target.iter_survey_responses() if row}
+    new_responses = (row for row in source.iter_survey_responses() if row and _response_id(row) not in response_ids)
+    responses = sum(target.add_survey_responses(batch) for batch in _batches(new_responses, batch_rows))
+
+    target.flush()
+    return {"leads": leads, "survey_responses": responses}
+
+# ————————————————————————————————————————————————————
+# App entry points
+# ————————————————————————————————————————————————————
+def save_lead(row: list) -> str:
+    """Record a lead in the durable outbox for delivery to the configured backend.
+
+    The only blocking work is the outbox commit. A lead the backend already
+    has is reported as a duplicate when local state shows it (see
+    Storage.peek_lead); otherwise it is accepted and skipped on delivery.
+
+    Args:
+        row: Lead row in LEAD_COLUMNS order (make_unique_key hash first).
+
+    Returns:
+        'added', 'duplicate', or 'error: <message>'.
+    """
+    from outbox import LEAD, get_outbox
+    try:
+        # Only what the backend knows locally: loading its index (a remote
+        # call) is left to the drainer, which skips keys already stored
+        if get_storage().peek_lead(row[0]):
+            return "duplicate"
+        return "added" if get_outbox().submit(LEAD, row[0], row) else "duplicate"
+    except Exception as e:
+        return f"error: {str(e)}"
+
+def save_survey_response(rating: int, user_id: str = "anon", name: str = "") -> str:
+    """Record a survey response (timestamped in Malaysia time) in the durable outbox.
+
+    Args:
+        rating: Integer, 1 to 4 (accuracy rating).
+        user_id: Optional identifier (email or anon/session).
+        name: User's name from input (optional).
+
+    Returns:
+        'added' or error string.
+    """
+    from outbox import SURVEY, get_outbox, survey_key
+    try:
+        import pytz
+        timestamp = dt.datetime.now(pytz.timezone('Asia/Kuala_Lumpur')).isoformat()
+        row = [timestamp, rating, user_id, name]
+        get_outbox().submit(SURVEY, survey_key(row), row)
+        return "added"
+    except Exception as e:
+        return f"error: {str(e)}"
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("usage: python storage.py <sheets|sqlite> <sheets|sqlite> [sqlite_path]")
+    path = sys.argv[3] if len(sys.argv) > 3 else None
+    counts = sync_storage(make_storage(sys.argv[1], path), make_storage(sys.argv[2], path))
+    print(f"Copied {counts['leads']} leads and {counts['survey_responses']} survey responses")
@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+# Bounded in-memory cache shared by all threads (and so all Streamlit
+# sessions) of a process. Entries are evicted least recently used once
+# maxsize is reached and expire ttl_s after they were stored. A hit is one
+# dict lookup and a move_to_end under a lock.
+
+MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed time."""
+
+    def __init__(self, maxsize: int, ttl_s: float) -> None:
+        """Create an empty cache.
+
+        Args:
+            maxsize: Entries kept before least recently used ones are evicted.
+            ttl_s: Lifetime of an entry in seconds.
+        """
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value, or MISSING if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return MISSING
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond maxsize."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Return hits, misses, hit_rate, size, evictions and expirations."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits, "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "size": len(self._entries), "evictions": self._evictions, "expirations": self._expirations,
+            }
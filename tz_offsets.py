@@ -0,0 +1,279 @@
+import datetime as dt
+import gzip
+import json
+import os
+import sys
+import tempfile
+import zoneinfo
+from bisect import bisect_right
+from functools import lru_cache
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+import numpy as np
+
+# Exact UTC offsets (including half/quarter-hour zones and historical LMT)
+# from per-zone transition tables.
+#
+# zoneinfo does not expose its transitions, so each zone is compiled once by
+# sampling its UTC offset daily over TRANSITION_RANGE and bisecting every
+# change down to the second. A local wall time w then resolves with one
+# bisection over the wall-clock thresholds of the transitions. Matching
+# zoneinfo's PEP 495 semantics, fold=0 keeps the pre-transition offset both
+# in a DST gap (nonexistent times) and in a fold (repeated times); fold=1
+# takes the post-transition offset. So transition k (offset a -> b at UTC
+# instant u) switches at wall time u + max(a, b) for fold=0 and u + min(a, b)
+# for fold=1.
+#
+# Outside TRANSITION_RANGE the first/last offset applies (LMT before, and
+# standard time after — DST rules are not extended past the range).
+#
+# Compiling takes about 0.2 s per zone, so the zones the app can resolve to
+# (country index and gazetteer) are precompiled at deploy time into
+# data/tz_transitions.json.gz (python tz_offsets.py). The file is tagged with
+# the tz database version and ignored when the host's version differs; the
+# app's warm-up thread builds it when it is missing or stale, so requests
+# only compile zones that are not covered.
+
+TRANSITION_RANGE = (dt.datetime(1850, 1, 1, tzinfo=dt.timezone.utc), dt.datetime(2101, 1, 1, tzinfo=dt.timezone.utc))
+_SAMPLE_STEP_S = 86400
+_UNIX_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+_US_PER_S = 1_000_000
+TRANSITIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tz_transitions.json.gz")
+
+class ZoneTransitions(NamedTuple):
+    """Compiled offset history of one zone (all values in seconds)."""
+    utc: tuple[int, ...]                # UTC instants (Unix seconds) of each transition
+    offsets: tuple[int, ...]            # offsets[0] before the first transition, offsets[k+1] after transition k
+    wall_fold0: tuple[int, ...]         # wall-clock switch points for fold=0
+    wall_fold1: tuple[int, ...]         # wall-clock switch points for fold=1
+
+def _offset_at(zone: ZoneInfo, ts: int) -> int:
+    """UTC offset of zone (seconds) at a Unix timestamp."""
+    return int((_UNIX_EPOCH + dt.timedelta(seconds=ts)).astimezone(zone).utcoffset().total_seconds())
+
+def _with_walls(utc: tuple[int, ...], offsets: tuple[int, ...]) -> ZoneTransitions:
+    wall_fold0 = tuple(u + max(a, b) for u, a, b in zip(utc, offsets, offsets[1:]))
+    wall_fold1 = tuple(u + min(a, b) for u, a, b in zip(utc, offsets, offsets[1:]))
+    return ZoneTransitions(utc, offsets, wall_fold0, wall_fold1)
+
+@lru_cache(maxsize=None)
+def zone_transitions(tz: str) -> ZoneTransitions:
+    """Return the transition table of an IANA zone (precompiled, or compiled once per process).
+
+    Args:
+        tz: IANA timezone name.
+
+    Returns:
+        ZoneTransitions.
+
+    Raises:
+        zoneinfo.ZoneInfoNotFoundError: If the zone does not exist.
+    """
+    precompiled = load_precompiled().get(tz)
+    if precompiled is not None:
+        return _with_walls(*precompiled)
+    return compile_zone(tz)
+
+def compile_zone(tz: str) -> ZoneTransitions:
+    """Compile the transition table of an IANA zone from zoneinfo (about 0.2 s).
+
+    Args:
+        tz: IANA timezone name.
+
+    Returns:
+        ZoneTransitions.
+
+    Raises:
+        zoneinfo.ZoneInfoNotFoundError: If the zone does not exist.
+    """
+    zone = ZoneInfo(tz)
+    start = int((TRANSITION_RANGE[0] - _UNIX_EPOCH).total_seconds())
+    stop = int((TRANSITION_RANGE[1] - _UNIX_EPOCH).total_seconds())
+    utc, offsets = [], [_offset_at(zone, start)]
+    prev_ts, prev_off = start, offsets[0]
+    for ts in range(start + _SAMPLE_STEP_S, stop + 1, _SAMPLE_STEP_S):
+        off = _offset_at(zone, ts)
+        if off == prev_off:
+            prev_ts = ts
+            continue
+        # First second with the new offset lies in (prev_ts, ts]
+        lo, hi = prev_ts, ts
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if _offset_at(zone, mid) == prev_off:
+                lo = mid
+            else:
+                hi = mid
+        utc.append(hi)
+        offsets.append(off)
+        prev_ts, prev_off = ts, off
+    return _with_walls(tuple(utc), tuple(offsets))
+
+# ————————————————————————————————————————————————————
+# Precompiled Zones
+# ————————————————————————————————————————————————————
+def tz_database_version() -> str | None:
+    """Return the version of the tz database zoneinfo reads (e.g. "2025b"), or None if unknown."""
+    for base in zoneinfo.TZPATH:
+        try:
+            with open(os.path.join(base, "tzdata.zi"), encoding="utf-8") as f:
+                first = f.readline()
+        except OSError:
+            continue
+        if first.startswith("# version"):
+            return first.split()[-1]
+    try:
+        import tzdata
+        return tzdata.IANA_VERSION
+    except ImportError:
+        return None
+
+def _file_tag() -> dict[str, object]:
+    return {"version": tz_database_version(), "range": [d.isoformat() for d in TRANSITION_RANGE]}
+
+@lru_cache(maxsize=4)
+def load_precompiled(path: str = TRANSITIONS_PATH) -> dict[str, tuple[tuple[int, ...], tuple[int, ...]]]:
+    """Load precompiled zones (once per process).
+
+    Returns:
+        Mapping of zone name to (utc, offsets); empty if the file is missing
+        or was built from another tz database version or range.
+    """
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if raw.get("tag") != _file_tag():
+        return {}
+    return {tz: (tuple(utc), tuple(offsets)) for tz, (utc, offsets) in raw["zones"].items()}
+
+def zones_in_use() -> list[str]:
+    """Zones the app can resolve places to: the country index's and the gazetteer's."""
+    from country_index import load_country_index
+    from gazetteer import read_source_rows
+    zones = {location.timezone for location in load_country_index().values()}
+    zones.update(row["timezone"] for row in read_source_rows())
+    return sorted(zones)
+
+def build_precompiled(zones: list[str] | None = None, path: str = TRANSITIONS_PATH) -> str:
+    """Compile zones into the precompiled file (about 0.2 s per zone).
+
+    Args:
+        zones: Zone names (default: zones_in_use()).
+        path: Output path (written atomically).
+
+    Returns:
+        The path written.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    compiled = {}
+    for tz in zones if zones is not None else zones_in_use():
+        try:
+            zone = compile_zone(tz)
+        except zoneinfo.ZoneInfoNotFoundError:
+            continue
+        compiled[tz] = [zone.utc, zone.offsets]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".json.gz")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+            gz.write(json.dumps({"tag": _file_tag(), "zones": compiled}, separators=(",", ":")).encode("utf-8"))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    load_precompiled.cache_clear()
+    return path
+
+def warm_up_zones() -> int:
+    """Make every zone in use resolve without compiling on a request.
+
+    Loads the precompiled file, building it first if it is missing or stale;
+    if it cannot be written, the zones are compiled into this process instead.
+
+    Returns:
+        Number of zones ready.
+    """
+    zones = zones_in_use()
+    if not set(zones) <= load_precompiled().keys():
+        try:
+            build_precompiled(zones)
+        except OSError:
+            pass
+    for tz in zones:
+        try:
+            zone_transitions(tz)
+        except zoneinfo.ZoneInfoNotFoundError:
+            pass
+    return zone_transitions.cache_info().currsize
+
+def _wall_seconds(local_dt: dt.datetime) -> float:
+    """Naive wall time as seconds on the Unix time line."""
+    return (local_dt.replace(tzinfo=dt.timezone.utc) - _UNIX_EPOCH).total_seconds()
+
+def utc_offset_seconds(tz: str, local_dt: dt.datetime, fold: int = 0) -> int:
+    """Return the UTC offset in force at a local wall time.
+
+    Args:
+        tz: IANA timezone name.
+        local_dt: Naive local datetime.
+        fold: 0 or 1, selecting the offset before/after a transition for
+            times in a DST gap or fold (as datetime.fold).
+
+    Returns:
+        Offset in seconds.
+    """
+    zone = zone_transitions(tz)
+    walls = zone.wall_fold1 if fold else zone.wall_fold0
+    return zone.offsets[bisect_right(walls, _wall_seconds(local_dt))]
+
+def utc_offset_hours(tz: str, local_dt: dt.datetime, fold: int = 0) -> float:
+    """Return the UTC offset in hours (e.g. 5.5 for India, 5.75 for Nepal).
+
+    Args:
+        tz: IANA timezone name.
+        local_dt: Naive local datetime.
+        fold: 0 or 1 (see utc_offset_seconds).
+
+    Returns:
+        Offset in hours.
+    """
+    return utc_offset_seconds(tz, local_dt, fold) / 3600
+
+@lru_cache(maxsize=None)
+def _zone_arrays(tz: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Transition table of a zone as arrays (wall times in microseconds)."""
+    zone = zone_transitions(tz)
+    return (
+        np.asarray(zone.offsets, dtype=np.int64),
+        np.asarray(zone.wall_fold0, dtype=np.int64) * _US_PER_S,
+        np.asarray(zone.wall_fold1, dtype=np.int64) * _US_PER_S,
+    )
+
+def utc_offsets_hours(zones, local_dts, fold: int = 0) -> np.ndarray:
+    """Resolve UTC offsets for many records at once.
+
+    Args:
+        zones: IANA timezone name, or array-like of names (one per record).
+        local_dts: Array-like of naive local datetimes (datetime64 compatible).
+        fold: 0 or 1 (see utc_offset_seconds).
+
+    Returns:
+        float64 array of offsets in hours.
+    """
+    local_us = np.asarray(local_dts, dtype="datetime64[us]").astype(np.int64)
+    zones = np.broadcast_to(np.asarray(zones, dtype=object), local_us.shape)
+    result = np.empty(local_us.shape, dtype=np.int64)
+    for tz in set(zones.ravel().tolist()):
+        mask = zones == tz
+        offsets, wall_fold0, wall_fold1 = _zone_arrays(tz)
+        walls = wall_fold1 if fold else wall_fold0
+        result[mask] = offsets[np.searchsorted(walls, local_us[mask], side="right")]
+    return result / 3600
+
+if __name__ == "__main__":
+    print(f"Wrote {build_precompiled(sys.argv[1:] or None)}")